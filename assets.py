@@ -0,0 +1,156 @@
+"""
+Game images, collision masks and fonts, loaded the first time they are needed.
+
+Decoding the PNGs and scaling them up is the slow part of starting the game, so
+the scaled sprites are kept in a cache file next to this module and later
+starts rebuild them from the raw pixels instead. The cache is thrown away when
+an image file or the pygame version changes.
+"""
+import functools
+import os
+import pickle
+
+import pygame
+
+LOCAL_DIR = os.path.dirname(os.path.abspath(__file__))
+IMG_DIR = os.path.join(LOCAL_DIR, "imgs")
+CACHE_PATH = os.environ.get("FLAPPY_SPRITE_CACHE", os.path.join(LOCAL_DIR, ".cache", "sprites.pickle"))
+SPRITES = ("bird1", "bird2", "bird3", "pipe", "base", "bg")
+
+
+def _cache_key():
+    """
+    :return: what the cache was built from, the cache is only used if this still matches
+    """
+    files = []
+    for name in SPRITES:
+        stat = os.stat(os.path.join(IMG_DIR, name + ".png"))
+        files.append((name, stat.st_size, stat.st_mtime_ns))
+    return pygame.version.ver, tuple(files)
+
+
+def _pack(surface):
+    """
+    :return: everything needed to rebuild the surface exactly, as plain picklable values
+    """
+    if surface.get_bitsize() == 8:
+        return (surface.get_size(), "P", pygame.image.tobytes(surface, "P"),
+                [tuple(color) for color in surface.get_palette()], surface.get_colorkey())
+    fmt = "RGBA" if surface.get_flags() & pygame.SRCALPHA else "RGB"
+    return surface.get_size(), fmt, pygame.image.tobytes(surface, fmt), None, surface.get_colorkey()
+
+
+def _unpack(packed):
+    size, fmt, data, palette, colorkey = packed
+    surface = pygame.image.frombytes(data, size, fmt)
+    if palette is not None:
+        surface.set_palette(palette)
+    if colorkey is not None:
+        surface.set_colorkey(colorkey)
+    return surface
+
+
+def _read_cache(key):
+    try:
+        with open(CACHE_PATH, "rb") as f:
+            cached_key, packed = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        return None
+    if cached_key != key:
+        return None
+    return dict((name, _unpack(p)) for name, p in packed.items())
+
+
+def _write_cache(key, sprites):
+    packed = dict((name, _pack(surface)) for name, surface in sprites.items())
+    tmp_path = "{0}.{1}.tmp".format(CACHE_PATH, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump((key, packed), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, CACHE_PATH)  # so other processes never see half a file
+    except OSError:
+        pass  # a read-only checkout still works, it just decodes the images every time
+
+
+@functools.lru_cache(maxsize=None)
+def sprites():
+    """
+    :return: dict of sprite name to the scaled up surface
+    """
+    key = _cache_key()
+    loaded = _read_cache(key)
+    if loaded is None:
+        loaded = dict((name, pygame.transform.scale2x(pygame.image.load(os.path.join(IMG_DIR, name + ".png"))))
+                      for name in SPRITES)
+        _write_cache(key, loaded)
+    return loaded
+
+
+def bird_images():
+    """
+    :return: list of the three animation frames of the bird
+    """
+    images = sprites()
+    return [images["bird1"], images["bird2"], images["bird3"]]
+
+
+def pipe_image():
+    return sprites()["pipe"]
+
+
+@functools.lru_cache(maxsize=None)
+def pipe_top_image():
+    """
+    :return: the pipe image flipped to face down, flipped once and shared by every pipe
+    """
+    return pygame.transform.flip(pipe_image(), False, True)
+
+
+def base_image():
+    return sprites()["base"]
+
+
+def background():
+    return sprites()["bg"]
+
+
+@functools.lru_cache(maxsize=None)
+def opaque_background():
+    """
+    The background has no transparent pixels, so drawing it can be a copy instead
+    of an alpha blend, which is many times faster. Needs the display mode to be set
+    :return: the background in the pixel format of the display, without alpha
+    """
+    return background().convert()
+
+
+@functools.lru_cache(maxsize=None)
+def bird_masks():
+    """
+    Collision has always used the unrotated bird image, so there is one mask per animation frame
+    :return: list of masks, in the same order as bird_images
+    """
+    return [pygame.mask.from_surface(img) for img in bird_images()]
+
+
+@functools.lru_cache(maxsize=None)
+def pipe_masks():
+    """
+    :return: (mask of the top pipe, mask of the bottom pipe)
+    """
+    return pygame.mask.from_surface(pipe_top_image()), pygame.mask.from_surface(pipe_image())
+
+
+@functools.lru_cache(maxsize=None)
+def font(size):
+    pygame.font.init()  # init font
+    return pygame.font.SysFont("comicsans", size)
+
+
+def stat_font():
+    return font(50)
+
+
+def end_font():
+    return font(70)
@@ -0,0 +1,82 @@
+"""
+Pre-rotated bird sprites, so drawing a bird is a dictionary lookup and a blit
+instead of a pygame.transform.rotate call every frame.
+"""
+import math
+
+import pygame
+
+
+def round_half_away(value):
+    """
+    Round to the nearest int with halves away from zero, the way pygame.Rect
+    rounds float positions
+    """
+    whole = math.floor(abs(value))
+    if abs(value) - whole >= 0.5:
+        whole += 1
+    return int(math.copysign(whole, value))
+
+
+def reachable_tilts(max_rotation, rot_vel, start=0, lowest=-90):
+    """
+    All the tilts a bird can have: it starts at start, snaps up to max_rotation
+    and from either of those tilts down by rot_vel while it is above lowest
+    :return: set of tilts
+    """
+    tilts = set()
+    for tilt in (start, max_rotation):
+        tilts.add(tilt)
+        while tilt > lowest:
+            tilt -= rot_vel
+            tilts.add(tilt)
+    return tilts
+
+
+class RotationAtlas:
+    """
+    Rotated copies of the animation frames of the bird, keyed by (frame, tilt).
+    Each entry also keeps the offset from the unrotated top left corner to the
+    top left corner of the rotated image, so it stays centered on the same spot.
+    """
+
+    def __init__(self, images, tilts=()):
+        """
+        :param images: list of animation frames
+        :param tilts: tilts to rotate ahead of time, others are added the first time they are drawn
+        """
+        self.images = images
+        self.sprites = {}
+        for frame in range(len(images)):
+            for tilt in tilts:
+                self.get(frame, tilt)
+
+    def get(self, frame, tilt):
+        """
+        :param frame: index of the animation frame
+        :param tilt: angle in degrees
+        :return: (rotated surface, (x offset, y offset))
+        """
+        key = (frame, tilt)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            image = self.images[frame]
+            rotated_image = pygame.transform.rotate(image, tilt)
+            width, height = image.get_size()
+            rotated_width, rotated_height = rotated_image.get_size()
+            # same rounding as rotated_image.get_rect(center=image.get_rect(topleft=...).center)
+            offset = (width // 2 - rotated_width // 2, height // 2 - rotated_height // 2)
+            sprite = self.sprites[key] = (rotated_image, offset)
+        return sprite
+
+    def blit(self, surf, frame, topleft, tilt):
+        """
+        Draw a rotated frame, same result as blitRotateCenter
+        :param surf: the surface to blit to
+        :param frame: index of the animation frame
+        :param topleft: the top left position of the unrotated image
+        :param tilt: angle in degrees
+        :return: the rect that was drawn on
+        """
+        rotated_image, (dx, dy) = self.get(frame, tilt)
+        return surf.blit(rotated_image, (round_half_away(topleft[0]) + dx, round_half_away(topleft[1]) + dy))
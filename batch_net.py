@@ -0,0 +1,251 @@
+"""
+Evaluates the feed-forward networks of a whole generation with a few NumPy calls.
+
+Every genome is compiled the same way neat.nn.FeedForwardNetwork.create does it,
+then all of them are packed into padded per-layer weight tensors. One activate
+call then runs the networks of every living bird at once.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from neat.graphs import feed_forward_layers
+from neat.reporting import BaseReporter
+
+
+def tanh_activation(z):
+    return np.tanh(np.clip(2.5 * z, -60.0, 60.0))  # same scaling and clamp as neat.activations
+
+
+def sigmoid_activation(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0)))
+
+
+def relu_activation(z):
+    return np.maximum(z, 0.0)
+
+
+def identity_activation(z):
+    return z
+
+
+ACTIVATIONS = {
+    "tanh": tanh_activation,
+    "sigmoid": sigmoid_activation,
+    "relu": relu_activation,
+    "identity": identity_activation,
+}
+ACTIVATION_NAMES = list(ACTIVATIONS)
+
+
+def compile_genome(genome, config):
+    """
+    Work out the evaluation order of a genome, like FeedForwardNetwork.create
+    :param genome: neat genome
+    :param config: neat config
+    :return: list of layers, each a list of (node, activation, bias, response, [(input node, weight)])
+    """
+    connections = [cg.key for cg in genome.connections.values() if cg.enabled]
+    gc = config.genome_config
+
+    layers = []
+    for layer in feed_forward_layers(gc.input_keys, gc.output_keys, connections):
+        nodes = []
+        for node in sorted(layer):
+            ng = genome.nodes[node]
+            if ng.aggregation != "sum":
+                raise ValueError("BatchNetwork only supports the sum aggregation, not {0!r}".format(ng.aggregation))
+            if ng.activation not in ACTIVATIONS:
+                raise ValueError("BatchNetwork does not support the {0!r} activation".format(ng.activation))
+
+            links = [(i, genome.connections[(i, o)].weight) for (i, o) in connections if o == node]
+            nodes.append((node, ng.activation, ng.bias, ng.response, links))
+        layers.append(nodes)
+
+    return layers
+
+
+def fingerprint(genome):
+    """
+    Everything compile_genome reads from a genome, so two genomes with the same
+    fingerprint compile to the same layers
+    :param genome: neat genome
+    :return: hashable tuple of the enabled connections and the nodes
+    """
+    connections = tuple(sorted((cg.key, cg.weight) for cg in genome.connections.values() if cg.enabled))
+    nodes = tuple(sorted((key, ng.bias, ng.response, ng.activation, ng.aggregation)
+                         for key, ng in genome.nodes.items()))
+    return connections, nodes
+
+
+class CompileCache:
+    """
+    Least recently used cache of compile_genome results keyed by fingerprint.
+    Elites and offspring that came through mutation unchanged are compiled once
+    instead of every generation. One cache must only be used with one config.
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        :param maxsize: number of compiled genomes to keep
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def compile(self, genome, config):
+        """
+        compile_genome, or the layers of an earlier genome with the same fingerprint
+        :return: list of layers like compile_genome, shared with the cache so don't change it
+        """
+        key = fingerprint(genome)
+        layers = self.entries.get(key)
+        if layers is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return layers
+
+        self.misses += 1
+        layers = self.entries[key] = compile_genome(genome, config)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)  # the least recently used one
+        return layers
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+
+class CompileCacheReporter(BaseReporter):
+    """
+    Prints how many genomes of every generation were found in a CompileCache
+    """
+
+    def __init__(self, cache):
+        """
+        :param cache: the CompileCache used by the evaluation
+        """
+        self.cache = cache
+
+    def start_generation(self, generation):
+        self.cache.reset_stats()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        cache = self.cache
+        total = cache.hits + cache.misses
+        if not total:
+            return
+        print("Compile cache: {0} hits, {1} misses ({2:.1%} hit rate)".format(
+            cache.hits, cache.misses, cache.hits / total))
+
+
+class BatchNetwork:
+    """
+    The networks of many genomes packed in padded NumPy arrays.
+
+    Node values live in one row per network. The first columns hold the inputs,
+    then one always-zero column, then a block of columns for every layer. A
+    network with fewer nodes in a layer than the widest one leaves its extra
+    columns with zero weights, so they never change anything.
+    """
+
+    def __init__(self, num_inputs, layers, output_slots):
+        """
+        :param num_inputs: number of network inputs
+        :param layers: list of (weights, bias, response, activation) arrays per layer
+        :param output_slots: (networks, outputs) array with the column of every output
+        """
+        self.num_inputs = num_inputs
+        self.layers = layers
+        self.output_slots = output_slots
+        self.num_slots = num_inputs + 1 + sum(bias.shape[1] for weights, bias, response, activation in layers)
+
+    def __len__(self):
+        return len(self.output_slots)
+
+    @staticmethod
+    def create(genomes, config, cache=None):
+        """
+        Receives a list of genomes and returns their phenotypes packed in one BatchNetwork
+        :param cache: CompileCache to look the genomes up in, None to compile every genome
+        """
+        if cache is None:
+            return BatchNetwork.from_compiled([compile_genome(g, config) for g in genomes], config)
+        return BatchNetwork.from_compiled([cache.compile(g, config) for g in genomes], config)
+
+    @staticmethod
+    def from_compiled(compiled, config):
+        """
+        Pack genomes that were already run through compile_genome
+        :param compiled: list with the result of compile_genome for every genome
+        :param config: neat config
+        :return: BatchNetwork
+        """
+        gc = config.genome_config
+        num_inputs = len(gc.input_keys)
+        zero_slot = num_inputs
+        count = len(compiled)
+        depth = max([len(genome_layers) for genome_layers in compiled] + [0])
+
+        layers = []
+        offset = num_inputs + 1
+        slots = [dict((key, i) for i, key in enumerate(gc.input_keys)) for _ in compiled]
+        for k in range(depth):
+            width = max(len(genome_layers[k]) if k < len(genome_layers) else 0 for genome_layers in compiled)
+            weights = np.zeros((count, offset, width))
+            bias = np.zeros((count, width))
+            response = np.zeros((count, width))
+            activation = np.zeros((count, width), dtype=np.int64)
+
+            for n, genome_layers in enumerate(compiled):
+                if k >= len(genome_layers):
+                    continue
+                for j, (node, act, b, resp, links) in enumerate(genome_layers[k]):
+                    for i, w in links:
+                        weights[n, slots[n][i], j] += w
+                    bias[n, j] = b
+                    response[n, j] = resp
+                    activation[n, j] = ACTIVATION_NAMES.index(act)
+                    slots[n][node] = offset + j
+
+            layers.append((weights, bias, response, activation))
+            offset += width
+
+        output_slots = np.array([[s.get(key, zero_slot) for key in gc.output_keys] for s in slots], dtype=np.int64)
+        return BatchNetwork(num_inputs, layers, output_slots.reshape(count, len(gc.output_keys)))
+
+    def activate(self, inputs, rows=None):
+        """
+        Run a batch of networks
+        :param inputs: (len(rows), num_inputs) array with the inputs of every network to run
+        :param rows: which networks to run, in the same order as inputs, all of them if None
+        :return: (len(rows), num_outputs) array of outputs
+        """
+        inputs = np.asarray(inputs, dtype=np.float64)
+        if rows is None:
+            rows = np.arange(len(self))
+        if inputs.shape != (len(rows), self.num_inputs):
+            raise RuntimeError("Expected inputs of shape {0}, got {1}".format((len(rows), self.num_inputs),
+                                                                              inputs.shape))
+
+        values = np.zeros((len(rows), self.num_slots))
+        values[:, :self.num_inputs] = inputs
+        offset = self.num_inputs + 1
+        for weights, bias, response, activation in self.layers:
+            width = bias.shape[1]
+            s = np.einsum("rs,rsk->rk", values[:, :offset], weights[rows])
+            z = bias[rows] + response[rows] * s
+            out = values[:, offset:offset + width]
+            if not activation.any():  # every node uses tanh, the usual case
+                out[:] = tanh_activation(z)
+            else:
+                act = activation[rows]
+                for a in np.unique(act):
+                    mask = act == a
+                    out[mask] = ACTIVATIONS[ACTIVATION_NAMES[a]](z[mask])
+            offset += width
+
+        return values[np.arange(len(rows))[:, None], self.output_slots[rows]]
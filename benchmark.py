@@ -0,0 +1,343 @@
+"""
+Benchmarks for the simulation hot paths.
+
+Runs headless (SDL dummy video driver, no GPU needed) and writes the results to
+a JSON file so two commits can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # must be set before pygame opens a display
+
+import neat
+import numpy as np
+import pygame
+
+import assets
+import game
+from batch_net import BatchNetwork, CompileCache
+from budget import EpisodeBudget
+from flock import Flock
+from vec_env import VecEnv
+
+LOCAL_DIR = os.path.dirname(os.path.abspath(__file__))
+SIZES = (20, 200, 2000)
+SEED = 1234  # pipe course and genome seed, so every run measures the same work
+MAX_FRAMES = 3000  # a generation can otherwise last forever once a bird learns to fly
+COURSES = 8  # courses per genome in the play_courses benchmark
+
+
+def timed(fn, min_time):
+    """
+    Call fn until min_time seconds have passed
+    :param fn: function to time, returns how many operations it did
+    :param min_time: seconds to keep calling fn for
+    :return: (best seconds per call, operations per call)
+    """
+    best = float("inf")
+    ops = 0
+    total = 0.0
+    while total < min_time:
+        start = time.perf_counter()
+        ops = fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+    return best, ops
+
+
+def load_config():
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                              neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                              os.path.join(LOCAL_DIR, "config.txt"))
+
+
+def make_genomes(config, size):
+    """
+    :return: list of (genome id, genome) of a fresh, seeded population of size genomes
+    """
+    random.seed(SEED)
+    config.pop_size = size
+    return list(neat.Population(config).population.items())
+
+
+def make_flock(size):
+    rng = np.random.default_rng(SEED)
+    flock = Flock(size, game.BIRD_X, game.BIRD_Y, [img.get_height() for img in assets.bird_images()])
+    flock.y[:] = rng.uniform(0, game.FLOOR - 50, size)
+    flock.frame[:] = rng.integers(0, len(assets.bird_images()), size)
+    flock.tilt[:] = rng.choice([25, 5, -15, -35, -55, -75, -95], size)
+    return flock
+
+
+def bench_bird_move(train, config, size):
+    birds = [game.Bird(game.BIRD_X, game.BIRD_Y) for _ in range(size)]
+
+    def run():
+        for bird in birds:
+            bird.move()
+            if bird.y > 600:
+                bird.jump()
+        return size
+    return run
+
+
+def bench_flock_move(train, config, size):
+    flock = make_flock(size)
+
+    def run():
+        flock.move()
+        flock.jump(flock.y > 600)
+        return size
+    return run
+
+
+def bench_flock_kill(train, config, size):
+    flock = make_flock(size)
+    order = np.random.default_rng(SEED).permutation(size)  # birds die in a random order, a few per frame
+
+    def run():
+        for i in range(0, size, 4):
+            flock.kill(order[i:i + 4])
+            flock.alive_indices()
+        flock.reset(order, game.BIRD_Y)
+        return size
+    return run
+
+
+def bench_pipe_collide(train, config, size):
+    flock = make_flock(size)
+    birds = []
+    for i in range(size):
+        bird = game.Bird(game.BIRD_X, flock.y[i])
+        bird.frame = flock.frame[i]
+        birds.append(bird)
+    pipe = game.Pipe(200, 250)  # overlapping the birds horizontally, so the broad phase can't skip everything
+
+    def run():
+        for bird in birds:
+            pipe.collide(bird)
+        return size
+    return run
+
+
+def bench_collide_flock(train, config, size):
+    flock = make_flock(size)
+    pipe = game.Pipe(200, 250)
+
+    def run():
+        pipe.collide_flock(flock)
+        return size
+    return run
+
+
+def bench_blit_rotate(train, config, size):
+    flock = make_flock(size)
+    surf = pygame.Surface((game.MIN_WIDTH, game.MIN_HEIGHT))
+
+    def run():
+        for i in range(size):
+            game.blitRotateCenter(surf, assets.bird_images()[flock.frame[i]], (flock.x, flock.y[i]), flock.tilt[i])
+        return size
+    return run
+
+
+def bench_atlas_blit(train, config, size):
+    flock = make_flock(size)
+    surf = pygame.Surface((game.MIN_WIDTH, game.MIN_HEIGHT))
+
+    def run():
+        for i in range(size):
+            game.bird_atlas().blit(surf, flock.frame[i], (flock.x, flock.y[i]), flock.tilt[i])
+        return size
+    return run
+
+
+def bench_draw_window(train, config, size):
+    flock = make_flock(size)
+    win = pygame.display.set_mode((game.MIN_WIDTH, game.MIN_HEIGHT))
+    pipes = [game.Pipe(300, 250), game.Pipe(600, 300)]
+    base = game.Base(game.FLOOR)
+
+    def run():
+        train.draw_window(win, flock, pipes, base, 0, 1, 0)
+        return 1
+    return run
+
+
+def bench_feed_forward(train, config, size):
+    nets = [neat.nn.FeedForwardNetwork.create(g, config) for gid, g in make_genomes(config, size)]
+    inputs = np.random.default_rng(SEED).uniform(0, 700, (size, 3)).tolist()
+
+    def run():
+        for net, x in zip(nets, inputs):
+            net.activate(x)
+        return size
+    return run
+
+
+def bench_batch_network(train, config, size):
+    net = BatchNetwork.create([g for gid, g in make_genomes(config, size)], config)
+    inputs = np.random.default_rng(SEED).uniform(0, 700, (size, 3))
+    rows = np.arange(size)
+
+    def run():
+        net.activate(inputs, rows)
+        return size
+    return run
+
+
+def bench_batch_create(train, config, size):
+    genomes = [g for gid, g in make_genomes(config, size)]
+
+    def run():
+        BatchNetwork.create(genomes, config)
+        return size
+    return run
+
+
+def bench_batch_create_cached(train, config, size):
+    genomes = [g for gid, g in make_genomes(config, size)]
+    cache = CompileCache()
+    BatchNetwork.create(genomes, config, cache)  # every genome is a hit from here on
+
+    def run():
+        BatchNetwork.create(genomes, config, cache)
+        return size
+    return run
+
+
+def bench_vec_env(train, config, size):
+    env = VecEnv(size)
+    env.reset(SEED)
+    rng = np.random.default_rng(SEED)
+    actions = rng.random((64, size)) < 0.08
+
+    def run():
+        for step_actions in actions:
+            obs, rewards, done = env.step(step_actions)
+            if done.any():
+                env.reset(SEED, np.flatnonzero(done))
+        return len(actions) * size
+    return run
+
+
+def bench_play_courses(train, config, size):
+    net = BatchNetwork.create([g for gid, g in make_genomes(config, size)], config)
+    seeds = [SEED + k for k in range(COURSES)]
+
+    def run():
+        train.play_courses(net, seeds, MAX_FRAMES)
+        return COURSES
+    return run
+
+
+def bench_eval_genomes(train, config, size):
+    genomes = make_genomes(config, size)
+    train.HEADLESS = True
+    train.SEED = SEED
+    train.BUDGET = EpisodeBudget(MAX_FRAMES)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):  # eval_genomes prints a line per generation
+            train.eval_genomes(genomes, config)
+        return 1
+    return run
+
+
+def bench_renderer(train, config, size):
+    flock = make_flock(size)
+    win = pygame.display.set_mode((game.MIN_WIDTH, game.MIN_HEIGHT))
+    pipes = [game.Pipe(300, 250), game.Pipe(600, 300)]
+    base = game.Base(game.FLOOR)
+    renderer = train.Renderer(win)
+
+    def run():
+        for pipe in pipes:
+            pipe.move()
+        base.move()
+        renderer.draw(flock, pipes, base, 0, 1, 0)
+        return 1
+    return run
+
+
+# name, what one operation is, setup function
+BENCHMARKS = [
+    ("bird_move", "bird steps", bench_bird_move),
+    ("flock_move", "bird steps", bench_flock_move),
+    ("flock_kill", "bird deaths", bench_flock_kill),
+    ("pipe_collide", "collide calls", bench_pipe_collide),
+    ("collide_flock", "bird collisions", bench_collide_flock),
+    ("blit_rotate", "blits", bench_blit_rotate),
+    ("atlas_blit", "blits", bench_atlas_blit),
+    ("draw_window", "frames", bench_draw_window),
+    ("renderer", "frames", bench_renderer),
+    ("feed_forward", "activations", bench_feed_forward),
+    ("batch_network", "activations", bench_batch_network),
+    ("batch_create", "genomes", bench_batch_create),
+    ("batch_create_cached", "genomes", bench_batch_create_cached),
+    ("vec_env", "env steps", bench_vec_env),
+    ("eval_genomes", "generations", bench_eval_genomes),
+    ("play_courses", "courses", bench_play_courses),
+]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=LOCAL_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the flappy bird hot paths")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to write the results to")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="comma separated population sizes")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="seconds to repeat each benchmark for")
+    parser.add_argument("--only", help="comma separated benchmark names to run")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    train = game.load_training()
+    config = load_config()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    only = set(args.only.split(",")) if args.only else None
+
+    results = []
+    for name, unit, setup in BENCHMARKS:
+        if only and name not in only:
+            continue
+        for size in sizes:
+            seconds, ops = timed(setup(train, config, size), args.min_time)
+            results.append({"name": name, "size": size, "unit": unit, "ops": ops,
+                            "seconds": seconds, "ops_per_sec": ops / seconds})
+            print("{0:20s} {1:6d} {2:14.1f} {3}/sec".format(name, size, ops / seconds, unit))
+
+    with open(output, "w") as f:
+        json.dump({
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "neat": getattr(neat, "__version__", None),
+            "platform": platform.platform(),
+            "results": results,
+        }, f, indent=2)
+    print("Results written to {0}".format(output))
+
+
+if __name__ == "__main__":
+    main()
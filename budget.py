@@ -0,0 +1,68 @@
+"""
+How long one generation may play, and a report of the generations that were cut short.
+"""
+import math
+
+from neat.reporting import BaseReporter
+
+FRAME_BUDGET = "frame budget"
+SCORE_BUDGET = "score budget"
+FITNESS_THRESHOLD = "fitness threshold"
+
+
+class EpisodeBudget(BaseReporter):
+    """
+    Limits on the episode of a generation. Without limits a generation lasts
+    until the last bird dies, which is forever once one of them can fly.
+
+    With growth the frame budget is adaptive: every generation that runs into
+    it gets a budget growth times as large, so it grows along with the birds
+    instead of always cutting the best ones off at the same point.
+    """
+
+    def __init__(self, frames=None, score=None, growth=None, max_frames=None):
+        """
+        :param frames: stop after this many frames, None for no limit
+        :param score: stop once this many pipes were passed, None for no limit
+        :param growth: factor to grow the frame budget by when a generation hits it, None to keep it fixed
+        :param max_frames: the frame budget never grows beyond this, None for no cap
+        """
+        if growth is not None and frames is None:
+            raise ValueError("an adaptive budget needs a starting number of frames")
+        self.frames = frames
+        self.score = score
+        self.growth = growth
+        self.max_frames = max_frames
+        self.generation = None
+        self.stops = []  # (reason, frames) of every episode of this generation that didn't end by itself
+
+    def record(self, reason, frames):
+        """
+        Called with the outcome of every episode
+        :param reason: why the episode stopped before every bird was dead, None if it didn't
+        :param frames: number of frames that were played
+        :return: None
+        """
+        if reason is not None:
+            self.stops.append((reason, frames))
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.stops = []
+
+    def post_evaluate(self, config, population, species, best_genome):
+        if not self.stops:
+            return
+
+        for reason in sorted(set(reason for reason, frames in self.stops)):
+            frames = max(f for r, f in self.stops if r == reason)
+            print("Generation {0} stopped by the {1} after {2} frames, fitness of birds still alive is "
+                  "truncated".format(self.generation, reason, frames))
+
+        if self.growth is not None and any(reason == FRAME_BUDGET for reason, frames in self.stops):
+            grown = int(math.ceil(self.frames * self.growth))
+            if self.max_frames is not None:
+                grown = min(grown, self.max_frames)
+            if grown != self.frames:
+                self.frames = grown
+                print("Frame budget grown to {0} frames".format(self.frames))
@@ -0,0 +1,120 @@
+"""
+Checkpoints of a training run that it can be resumed from.
+"""
+import copy
+import gzip
+import os
+import pickle
+import random
+import threading
+
+import neat
+
+
+def write_gzip(filename, data, compresslevel):
+    """
+    Compress data into filename, through a temporary file so a crash never leaves half a checkpoint
+    """
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as f:
+        f.write(gzip.compress(data, compresslevel))
+    os.replace(tmp_filename, filename)
+
+
+class TrainingCheckpointer(neat.Checkpointer):
+    """
+    neat.Checkpointer that also saves the reporters (their statistics and the
+    episode budget), the genome numbering of the reproduction, the fittest genome
+    so far and whatever state the training script keeps between generations. The best genome is also written to a
+    file of its own next to every checkpoint.
+
+    Only pickling the state happens in the generation loop, compressing and
+    writing it is done by a background thread while the next generation runs.
+    """
+
+    def __init__(self, population, generation_interval=5, time_interval_seconds=None,
+                 filename_prefix="neat-checkpoint-", state=None, compresslevel=3):
+        """
+        :param population: the neat.Population to save, every reporter in it but this one is saved
+        :param generation_interval: save every this many generations, None to only save on time
+        :param time_interval_seconds: save when this many seconds passed since the last save, None to only save on
+                                      generations
+        :param filename_prefix: the checkpoint of generation N is saved as prefix + N, its best genome as
+                                prefix + N + "-best"
+        :param state: function returning a picklable dict of state to save with the checkpoint
+        :param compresslevel: gzip level, low levels are much faster and barely larger for pickles
+        """
+        neat.Checkpointer.__init__(self, generation_interval, time_interval_seconds, filename_prefix)
+        self.population = population
+        self.state = state
+        self.compresslevel = compresslevel
+        self.best = None  # copy of the fittest genome seen so far
+        self.writer = None  # thread writing the last checkpoint
+
+    def __getstate__(self):
+        # the species set keeps a reference to every reporter, so this one is pickled through it too,
+        # without the thread and the callbacks that can't be pickled
+        state = self.__dict__.copy()
+        state.update(population=None, state=None, writer=None)
+        return state
+
+    def post_evaluate(self, config, population, species, best_genome):
+        if self.best is None or best_genome.fitness > self.best.fitness:
+            self.best = copy.deepcopy(best_genome)  # elites get their fitness reset next generation
+
+    def save_checkpoint(self, config, population, species_set, generation):
+        filename = "{0}{1}".format(self.filename_prefix, generation)
+        print("Saving checkpoint to {0}".format(filename))
+
+        reporters = [reporter for reporter in self.population.reporters.reporters if reporter is not self]
+        reproduction = self.population.reproduction
+        state = self.state() if self.state is not None else {}
+        # end_generation runs after reproduction, so this population is already the next generation
+        data = pickle.dumps((generation + 1, config, population, species_set, random.getstate(),
+                             reproduction.genome_indexer, reproduction.ancestors, reporters, self.best, state),
+                            protocol=pickle.HIGHEST_PROTOCOL)
+        best = pickle.dumps(self.best, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.wait()  # one write at a time, they are much shorter than a generation anyway
+        self.writer = threading.Thread(target=self.write, args=(filename, data, best))
+        self.writer.start()
+
+    def write(self, filename, data, best):
+        write_gzip(filename, data, self.compresslevel)
+        write_gzip(filename + "-best", best, self.compresslevel)
+
+    def wait(self):
+        """
+        Block until the last checkpoint is on disk
+        :return: None
+        """
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+
+    @staticmethod
+    def restore_checkpoint(filename):
+        """
+        Resumes the simulation from a previous saved point
+        :param filename: checkpoint written by TrainingCheckpointer
+        :return: (Population, list of the saved reporters, best genome so far, saved state dict)
+        """
+        with gzip.open(filename) as f:
+            (generation, config, population, species_set, rndstate, genome_indexer, ancestors,
+             reporters, best, state) = pickle.load(f)
+        random.setstate(rndstate)
+        p = neat.Population(config, (population, species_set, generation))
+        p.species.reporters = p.reporters  # it still refers to the reporter set of the saved run
+        # a new reproduction would number the offspring from 1 again
+        p.reproduction.genome_indexer = genome_indexer
+        p.reproduction.ancestors = ancestors
+        return p, reporters, best, state
+
+    @staticmethod
+    def load_genome(filename):
+        """
+        :param filename: a "-best" file written next to a checkpoint
+        :return: the genome
+        """
+        with gzip.open(filename) as f:
+            return pickle.load(f)
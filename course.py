@@ -0,0 +1,55 @@
+"""
+Seeded pipe courses, so the same seed always gives the same pipes.
+"""
+import functools
+import random
+
+
+class Course:
+    """
+    The heights of the pipes of one course, in the order they spawn.
+    Heights are drawn from a seeded generator ahead of time and the list
+    grows in blocks when a run gets past the end of it.
+    """
+    MIN_HEIGHT = 50
+    MAX_HEIGHT = 450
+
+    def __init__(self, seed=None, length=256):
+        """
+        :param seed: seed of the course, None for a random one
+        :param length: number of heights to draw up front
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.heights = []
+        self.extend(length)
+
+    def extend(self, length):
+        """
+        Draw heights until the course is at least length pipes long
+        :param length: number of pipes
+        :return: None
+        """
+        randrange = self.rng.randrange
+        self.heights.extend(randrange(self.MIN_HEIGHT, self.MAX_HEIGHT)
+                            for _ in range(length - len(self.heights)))
+
+    def __getitem__(self, index):
+        """
+        :param index: which pipe, 0 is the first one to spawn
+        :return: height of the pipe
+        """
+        if index >= len(self.heights):
+            self.extend(max(index + 1, 2 * len(self.heights)))
+        return self.heights[index]
+
+
+@functools.lru_cache(maxsize=16)
+def get_course(seed):
+    """
+    Returns the course for a seed, reusing it for as long as the seed keeps coming back,
+    so generations and worker processes don't draw the same heights again
+    :param seed: int seed
+    :return: Course
+    """
+    return Course(seed)
@@ -1,320 +1,200 @@
+import argparse
+import math
+import multiprocessing
 import os
 import random
+import time
 
 import neat
+import numpy as np
 import pygame
 
-pygame.font.init()  # init font
+import assets
+from batch_net import BatchNetwork, CompileCache, CompileCacheReporter
+from budget import FITNESS_THRESHOLD, FRAME_BUDGET, SCORE_BUDGET, EpisodeBudget
+from checkpoint import TrainingCheckpointer
+from course import get_course
+from flock import Flock
+from game import BIRD_X, BIRD_Y, FIRST_PIPE_X, FLOOR, MIN_HEIGHT, MIN_WIDTH, PIPE_X, Base, PipePool, bird_atlas
+from live_view import SnapshotRing
+from remote import DEFAULT_AUTHKEY, Coordinator, parse_address, serve
+from replay import ReplayWriter, merge_jumps, pack_jumps, split_courses
+from stats_log import StatsLog
+from timing import NULL_TIMER, TimingReporter
+from vec_env import VecEnv
 
-MIN_WIDTH = 500
-MIN_HEIGHT = 800
-FLOOR = 730
-STAT_FONT = pygame.font.SysFont("comicsans", 50)
-END_FONT = pygame.font.SysFont("comicsans", 70)
 DRAW_LINES = False
 
-BIRD_IMGS = [
-    pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "bird1.png"))),
-    pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "bird2.png"))),
-    pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "bird3.png"))),
-]
-PIPE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "pipe.png")))
-BASE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "base.png")))
-BG_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "bg.png")))
-
 gen = 0
-
-
-class Bird:
-    IMGS = BIRD_IMGS
-    MAX_ROTATION = 25  # How much the bird will tilt
-    ROT_VEL = 20  # How much we will rotate on each frame
-    ANIMATION_TIME = 5  # How long each bird animation will last
-
-    # This is the constructor, it is called when we create a new bird
-    def __init__(self, x, y):
-        self.x = x  # Starting x position
-        self.y = y  # Starting y position
-        self.tilt = 0  # Starting tilt
-        self.tick_count = 0  # How many ticks since last jump
-        self.vel = 0  # Starting velocity
-        self.height = self.y  # Starting height
-        self.img_count = (
-            0  # Which image we are currently showing, keeps track of the animation
-        )
-        self.img = self.IMGS[0]  # Starting image
-
-    def jump(self):
-        self.vel = -10.5  # Negative velocity means up
-        self.tick_count = 0  # Reset tick count
-        self.height = self.y  # Reset height
-
-    def move(self):
-        self.tick_count += 1
-
-        # for downward acceleration
-        displacement = self.vel * self.tick_count + 0.5 * (3) * self.tick_count ** 2  # calculate displacement
-
-        # terminal velocity
-        if displacement >= 16:
-            displacement = (displacement/abs(displacement)) * 16
-
-        if displacement < 0:
-            displacement -= 2
-
-        self.y = self.y + displacement
-
-        if displacement < 0 or self.y < self.height + 50:  # tilt up
-            if self.tilt < self.MAX_ROTATION:
-                self.tilt = self.MAX_ROTATION
-        else:  # tilt down
-            if self.tilt > -90:
-                self.tilt -= self.ROT_VEL
-
-    def draw(self, win):
-        self.img_count += 1  # Increment image count
-
-        # For animation of bird, loop through three images
-        if self.img_count <= self.ANIMATION_TIME:
-            self.img = self.IMGS[0]
-        elif self.img_count <= self.ANIMATION_TIME * 2:
-            self.img = self.IMGS[1]
-        elif self.img_count <= self.ANIMATION_TIME * 3:
-            self.img = self.IMGS[2]
-        elif self.img_count <= self.ANIMATION_TIME * 4:
-            self.img = self.IMGS[1]
-        elif self.img_count == self.ANIMATION_TIME * 4 + 1:
-            self.img = self.IMGS[0]
-            self.img_count = 0
-
-        # so when bird is nose diving it isn't flapping
-        if self.tilt <= -80:
-            self.img = self.IMGS[1]
-            self.img_count = self.ANIMATION_TIME * 2
-
-        # tilt the bird
-        blitRotateCenter(win, self.img, (self.x, self.y), self.tilt)
-
-    def get_mask(self):
-        return pygame.mask.from_surface(self.img)  # This is for pixel perfect collision
-
-
-class Pipe:
-    GAP = 200
-    VEL = 5
-
-    def __init__(self, x):
-        self.x = x  # x position of the pipe
-        self.height = 0  # y position of the pipe
-
-        self.top = 0  # position of the top pipe
-        self.bottom = 0  # position of the bottom pipe
-        self.PIPE_TOP = pygame.transform.flip(
-            PIPE_IMG, False, True
-        )  # flips the pipe image to make it face down
-        self.PIPE_BOTTOM = PIPE_IMG  # pipe image
-
-        self.passed = False
-        self.set_height()
-
-    def set_height(self):
-        self.height = random.randrange(
-            50, 450
-        )  # generates a random height for the pipe between 50 and 450
-        self.top = self.height - self.PIPE_TOP.get_height()
-        self.bottom = self.height + self.GAP
-
-    def move(self):
-        self.x -= self.VEL
-
-    def draw(self, win):
-        win.blit(self.PIPE_TOP, (self.x, self.top))
-        win.blit(self.PIPE_BOTTOM, (self.x, self.bottom))
-
-    def collide(self, bird):
-        """
-        returns if a point is colliding with the pipe
-        :param bird: Bird object
-        :return: Bool
-        """
-        bird_mask = bird.get_mask()
-        top_mask = pygame.mask.from_surface(self.PIPE_TOP)
-        bottom_mask = pygame.mask.from_surface(self.PIPE_BOTTOM)
-        top_offset = (self.x - bird.x, self.top - round(bird.y))
-        bottom_offset = (self.x - bird.x, self.bottom - round(bird.y))
-
-        b_point = bird_mask.overlap(bottom_mask, bottom_offset)
-        t_point = bird_mask.overlap(top_mask, top_offset)
-
-        if b_point or t_point:
-            return True
-
-        return False
-
-
-class Base:
-    VEL = 5
-    WIDTH = BASE_IMG.get_width()
-    IMG = BASE_IMG
-
-    def __init__(self, y):
-        self.y = y
-        self.x1 = 0
-        self.x2 = self.WIDTH
-
-    def move(self):
-        self.x1 -= self.VEL
-        self.x2 -= self.VEL
-
-        # This makes the base move infinitely
-        if self.x1 + self.WIDTH < 0:  # if the first base image is off the screen
-            self.x1 = (
-                    self.x2 + self.WIDTH
-            )  # move the first base image to the right of the second base image
-        if self.x2 + self.WIDTH < 0:  # if the second base image is off the screen
-            self.x2 = (
-                    self.x1 + self.WIDTH
-            )  # move the second base image to the right of the first base image
-
-    def draw(self, win):
-        win.blit(self.IMG, (self.x1, self.y))
-        win.blit(self.IMG, (self.x2, self.y))
-
-
-def blitRotateCenter(surf, image, topleft, angle):
-    """
-    Rotate a surface and blit it to the window
-    :param surf: the surface to blit to
-    :param image: the image surface to rotate
-    :param topLeft: the top left position of the image
-    :param angle: a float value for angle
-    :return: None
-    """
-    rotated_image = pygame.transform.rotate(image, angle)
-    new_rect = rotated_image.get_rect(center=image.get_rect(topleft=topleft).center)
-
-    surf.blit(rotated_image, new_rect.topleft)
-
-
-def draw_window(win, birds, pipes, base, score, gen, pipe_ind):
+HEADLESS = False  # when True eval_genomes skips the window, the clock and drawing
+SEED = None  # course seed shared by every generation, None for a new course each generation
+BUDGET = EpisodeBudget()  # frame and score limits of a generation, no limits until run() sets them
+STOP_FITNESS = None  # end a generation as soon as a bird has this fitness, None to play it out
+TIMER = NULL_TIMER  # PhaseTimer of the TimingReporter when run() is asked for timing
+RENDER_EVERY = 1  # draw every Nth simulated frame when not headless
+TOP_K = None  # only draw this many of the fittest living birds, None to draw them all
+DECIDE_EVERY = 1  # the networks decide whether to jump every this many frames
+COURSES = 1  # number of courses every genome plays, more than 1 is always headless
+COURSE_STAT = "mean"  # how the fitness of the courses is combined, see aggregate_fitness
+RECORDER = None  # ReplayWriter every episode is logged to, None to not record
+COMPILE_CACHE = CompileCache()  # compiled networks of recent genomes, every worker process has its own
+STATS = None  # StatsLog the metrics of every generation are streamed to, None to not write them
+LIVE = None  # SnapshotRing every frame is published to for live_view.py, None to not publish
+
+
+def draw_window(win, flock, pipes, base, score, gen, pipe_ind):
     if gen == 0:
         gen = 1
-    win.blit(BG_IMG, (0, 0))  # This draws the background image
+    win.blit(assets.background(), (0, 0))  # This draws the background image
 
     for pipe in pipes:
         pipe.draw(win)
 
     base.draw(win)
 
+    alive = flock.alive_indices()
+
     # score
-    score_label = STAT_FONT.render("Score: " + str(score), 1, (255, 255, 255))
+    score_label = assets.stat_font().render("Score: " + str(score), 1, (255, 255, 255))
     win.blit(score_label, (MIN_WIDTH - score_label.get_width() - 15, 10))
 
     # generations
-    score_label = STAT_FONT.render("Gens: " + str(gen - 1), 1, (255, 255, 255))
+    score_label = assets.stat_font().render("Gens: " + str(gen - 1), 1, (255, 255, 255))
     win.blit(score_label, (10, 10))
 
     # alive
-    score_label = STAT_FONT.render("Alive: " + str(len(birds)), 1, (255, 255, 255))
+    score_label = assets.stat_font().render("Alive: " + str(len(alive)), 1, (255, 255, 255))
     win.blit(score_label, (10, 50))
 
-    for bird in birds:
+    for i in alive:
+        img = assets.bird_images()[flock.frame[i]]
+        y = flock.y[i]
         # draw lines from bird to pipe
         if DRAW_LINES:
             try:
                 pygame.draw.line(win, (255, 0, 0),
-                                 (bird.x + bird.img.get_width() / 2, bird.y + bird.img.get_height() / 2),
+                                 (flock.x + img.get_width() / 2, y + img.get_height() / 2),
                                  (pipes[pipe_ind].x + pipes[pipe_ind].PIPE_TOP.get_width() / 2, pipes[pipe_ind].height),
                                  5)
                 pygame.draw.line(win, (255, 0, 0),
-                                 (bird.x + bird.img.get_width() / 2, bird.y + bird.img.get_height() / 2), (
+                                 (flock.x + img.get_width() / 2, y + img.get_height() / 2), (
                                      pipes[pipe_ind].x + pipes[pipe_ind].PIPE_BOTTOM.get_width() / 2,
                                      pipes[pipe_ind].bottom), 5)
             except:
                 pass
         # draw bird
-        bird.draw(win)
+        bird_atlas().blit(win, flock.frame[i], (flock.x, y), flock.tilt[i])
 
     pygame.display.update()  # This updates the display
 
 
-def eval_genomes(genomes, config):
-    nets = []
-    ge = []
-    birds = []
-
-    global gen
-    gen += 1
-
-    for gid, g in genomes:  # g is the genome
-        g.fitness = 0
-        net = neat.nn.FeedForwardNetwork.create(g, config)
-        nets.append(net)
-        birds.append(Bird(230, 350))
-        ge.append(g)
+def play(net, seed, renderer=None, max_frames=None, timer=NULL_TIMER, decide_every=1, max_score=None,
+         stop_fitness=None, jumps=None, publisher=None):
+    """
+    Play one episode with a bird for every network. Birds never interact, so a bird
+    gets the same fitness whether it plays alone or together with others.
+    :param net: BatchNetwork with one network per bird
+    :param seed: seed of the pipe course
+    :param renderer: Renderer to watch the game with, or None to run headless
+    :param max_frames: stop after this many frames even if some birds are still alive
+    :param timer: PhaseTimer that gets the time spent in each part of the loop
+    :param decide_every: only run the networks every this many frames, birds don't jump in between
+    :param max_score: stop once this many pipes were passed
+    :param stop_fitness: stop as soon as any bird has at least this fitness
+    :param jumps: list to append (frame, array of the birds that jumped) to on every decision, for a replay
+    :param publisher: SnapshotRing to publish every frame to for viewers in other processes
+    :return: (array with the fitness of every bird, number of frames simulated, pipes passed,
+              why it stopped while birds were still alive or None)
+    """
+    if decide_every < 1:
+        raise ValueError("decide_every must be at least 1, got {0}".format(decide_every))
+    course = get_course(seed)  # the same seed always gives the same pipe heights
 
+    # every bird lives in one row of the flock arrays, in the same order as the networks
+    flock = Flock(len(net), BIRD_X, BIRD_Y, [img.get_height() for img in assets.bird_images()])
     base = Base(FLOOR)  # Create a new base object with starting position (730, 0)
-    pipes = [Pipe(700)]  # Create a new pipe object with starting position (700, 0)
-    win = pygame.display.set_mode(
-        (MIN_WIDTH, MIN_HEIGHT)
-    )  # Create a new window with width 500 and height 800
-    clock = (
-        pygame.time.Clock()
-    )  # this is a clock object that we will use to set the fps of the game
+    pool = PipePool()  # pipes that left the screen are used again for the new ones
+    pipes = [pool.get(FIRST_PIPE_X, course[0])]  # Create a new pipe object with starting position (700, 0)
+    if renderer is not None:
+        clock = (
+            pygame.time.Clock()
+        )  # this is a clock object that we will use to set the fps of the game
 
     score = 0
+    frames = 0
+    stopped = None
 
     run = True
-    while run and len(birds) > 0:
-        clock.tick(30)  # this sets the fps of the game to 30
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.quit()
-                quit()
-                break
+    while run and flock.any_alive():
+        if frames == max_frames:
+            stopped = FRAME_BUDGET
+            break
+        if score == max_score:
+            stopped = SCORE_BUDGET
+            break
+        if stop_fitness is not None and flock.fitness.max() >= stop_fitness:
+            stopped = FITNESS_THRESHOLD  # the fitness of dead birds can't change, so this one will be the best
+            break
+
+        frames += 1
+        timer.start_frame()
+        drawing = renderer is not None and renderer.due(frames)
+        if drawing:
+            clock.tick(renderer.fps)  # this sets the fps of the drawn frames, frames in between run at full speed
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    run = False
+                    pygame.quit()
+                    quit()
+                    break
+            timer.mark("events")
 
         pipe_ind = 0
-        if len(birds) > 0:
-            if len(pipes) > 1 and birds[0].x > pipes[0].x + pipes[0].PIPE_TOP.get_width():  # determine whether to
-                # use the first or second
-                pipe_ind = 1  # pipe on the screen for neural network input
-
-        for bird in birds:  # This moves each bird in the list
-            ge[birds.index(bird)].fitness += 0.1  # every frame the bird stays alive, it gets a fitness of 0.1
-            bird.move()
-
-            output = nets[birds.index(bird)].activate( #output determines whether the bird should jump or not
-                (
-                    bird.y, # y position of bird
-                    abs(bird.y - pipes[pipe_ind].height), # location of top pipe
-                    abs(bird.y - pipes[pipe_ind].bottom), # location of bottom pipe
-                )
+        if len(pipes) > 1 and flock.x > pipes[0].x + pipes[0].PIPE_TOP.get_width():  # determine whether to
+            # use the first or second
+            pipe_ind = 1  # pipe on the screen for neural network input
+
+        flock.reward(0.1)  # every frame a bird stays alive, it gets a fitness of 0.1
+        flock.move()  # moves every living bird at once
+        timer.mark("physics")
+
+        if (frames - 1) % decide_every == 0:  # frames 1, 1 + k, 1 + 2k, ...
+            alive = flock.alive_indices()
+            y = flock.y[alive]
+            output = net.activate(  # output determines whether each bird should jump or not
+                np.column_stack((
+                    y,  # y position of bird
+                    np.abs(y - pipes[pipe_ind].height),  # location of top pipe
+                    np.abs(y - pipes[pipe_ind].bottom),  # location of bottom pipe
+                )),
+                alive,  # only the networks of living birds are run
             )
-
-            if output[0] > 0.5: #since we use the activation function tanh, we get a value between -1 and 1
-                bird.jump()
+            # since we use the activation function tanh, we get a value between -1 and 1
+            jumped = alive[output[:, 0] > 0.5]
+            flock.jump(jumped)
+            if jumps is not None:
+                jumps.append((frames, jumped))
+            timer.mark("network")
 
         base.move()  # we call the move function of the base object every frame
+        for pipe in pipes:
+            pipe.move()  # we call the move function of the pipe object every frame
+        timer.mark("pipes")
+
+        for pipe in pipes:
+            hits = pipe.collide_flock(flock)
+            flock.fitness[hits] -= 1
+            flock.kill(hits)
+        timer.mark("collision")
 
         rem = []  # this is a list of pipes that we will remove
-        add_pipe = False # this determines whether we should add a pipe or not
+        add_pipe = False  # this determines whether we should add a pipe or not
         for pipe in pipes:
-            pipe.move() # we call the move function of the pipe object every frame
-            for x, bird in enumerate(birds):
-                if pipe.collide(bird):
-                    ge[x].fitness -= 1
-                    birds.pop(x)  # removes the bird from the list at index x
-                    nets.pop(x)
-                    ge.pop(x)
-
-                # this checks if the bird has passed the pipe and sets add_pipe to True if it has
-            if not pipe.passed and pipe.x < bird.x:
+            # this checks if the birds have passed the pipe and sets add_pipe to True if they have
+            if not pipe.passed and pipe.x < flock.x:
                 pipe.passed = True
                 add_pipe = True
-                # ge[x].fitness += 5
-                # pipes.append(Pipe(600))
 
             # this checks if the pipe is off the screen and adds it to the rem list if it is
             if pipe.x + pipe.PIPE_TOP.get_width() < 0:
@@ -322,43 +202,688 @@ def eval_genomes(genomes, config):
 
         if add_pipe:
             score += 1
-            for g in ge:
-                g.fitness += 5
-            pipes.append(Pipe(600))
+            flock.reward(5)
+            pipes.append(pool.get(PIPE_X, course[score]))  # a pipe is added for every point, so this is the next one
 
         # this removes the pipes in the rem list from the pipes list
         for r in rem:
             pipes.remove(r)
+            pool.release(r)
+        timer.mark("pipes")
 
-        for x, bird in enumerate(birds):
-            if bird.y + bird.img.get_height() >= 730 or bird.y < 0:
-                birds.pop(x)
-                nets.pop(x)
-                ge.pop(x)
+        flock.kill(flock.out_of_bounds(FLOOR))  # birds that hit the floor or the ceiling
 
-        draw_window(win, birds, pipes, base, score, gen, pipe_ind)  # this draws the window every frame
+        flock.animate()  # the animation frame decides the collision mask, so it runs headless too
+        timer.mark("physics")
 
+        if drawing:
+            renderer.draw(flock, pipes, base, score, gen, pipe_ind)
+            timer.mark("render")
+        if publisher is not None:
+            publisher.publish(flock, pipes, base, score, gen, pipe_ind, frames)  # never waits for the viewers
+            timer.mark("publish")
+        timer.end_frame()
 
+    return flock.fitness, frames, score, stopped
 
 
-def run(config_path):
-    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
-                                neat.DefaultSpeciesSet, neat.DefaultStagnation,
-                                config_path)
+def play_courses(net, seeds, max_frames=None, timer=NULL_TIMER, decide_every=1, max_score=None, jumps=None):
+    """
+    Play every network on every course at once. The games of all birds on all
+    courses are stacked in one VecEnv, so K courses cost one loop over the frames
+    instead of K. Each game plays out exactly like it would in play().
+    :param net: BatchNetwork with one network per bird
+    :param seeds: list of course seeds
+    :param max_frames: stop after this many frames even if some birds are still alive
+    :param timer: PhaseTimer that gets the time spent in each part of the loop
+    :param decide_every: only run the networks every this many frames
+    :param max_score: stop the games that passed this many pipes
+    :param jumps: list to append (frame, array of the games whose bird jumped) to on every decision
+    :return: ((len(seeds), len(net)) array with the fitness of every bird on every course,
+              number of frames simulated, most pipes passed in a game,
+              why a game stopped while its bird was alive or None)
+    """
+    if decide_every < 1:
+        raise ValueError("decide_every must be at least 1, got {0}".format(decide_every))
+
+    count = len(net)
+    env = VecEnv(len(seeds) * count)
+    obs = env.reset(np.repeat(seeds, count))  # the games of course k are rows k * count to (k + 1) * count
+    networks = np.tile(np.arange(count), len(seeds))  # the network that plays every game
+    jump = np.zeros(len(env), dtype=bool)
+    cut = np.zeros(len(env), dtype=bool)  # games stopped by a budget, not by their bird dying
+
+    frames = 0
+    stopped = None
+    while not env.done.all():
+        if frames == max_frames:
+            stopped = FRAME_BUDGET
+            cut |= ~env.done
+            break
+        frames += 1
+        timer.start_frame()
+
+        jump[:] = False
+        if (frames - 1) % decide_every == 0:
+            games = np.flatnonzero(~env.done)
+            jump[games] = net.activate(obs[games], networks[games])[:, 0] > 0.5
+            if jumps is not None:
+                jumps.append((frames, np.flatnonzero(jump)))
+            timer.mark("network")
+
+        obs, rewards, done = env.step(jump)
+        if max_score is not None:
+            reached = ~done & (env.score >= max_score)
+            if reached.any():
+                stopped = SCORE_BUDGET
+                cut |= reached
+                env.flock.kill(reached)
+        timer.mark("physics")
+        timer.end_frame()
+
+    fitness = env.fitness.copy()
+    fitness[cut] = env.settled[cut]  # the step that ended them already paid for the frame after it
+    return fitness.reshape(len(seeds), count), frames, int(env.score.max()), stopped
+
+
+def aggregate_fitness(fitness, statistic="mean"):
+    """
+    Combine the fitness of every genome on several courses into one number
+    :param fitness: (courses, genomes) array
+    :param statistic: "mean", "min", "median" or a quantile between 0 and 1
+    :return: array with the fitness of every genome
+    """
+    if statistic == "mean":
+        return fitness.mean(axis=0)
+    if statistic == "min":
+        return fitness.min(axis=0)
+    if statistic == "median":
+        return np.median(fitness, axis=0)
+    return np.quantile(fitness, float(statistic), axis=0)
 
-    p = neat.Population(config)
 
-    p.add_reporter(neat.StdOutReporter(True))
-    stats = neat.StatisticsReporter()
-    p.add_reporter(stats)
+class Renderer:
+    """
+    Draws the game for watching while it trains. Only every Nth frame is drawn,
+    optionally only for the fittest birds, the HUD labels are only rendered again
+    when their text changes, and only the parts of the screen that changed are
+    sent to the display.
+    """
+
+    def __init__(self, win, every=1, top_k=None, fps=30, start=1):
+        """
+        :param win: window to draw in
+        :param every: draw every Nth frame
+        :param top_k: only draw this many of the fittest living birds, None for all of them
+        :param fps: how many drawn frames to show per second at most
+        :param start: draw nothing before this frame, the ones before it are simulated at full speed
+        """
+        self.win = win
+        self.every = every
+        self.top_k = top_k
+        self.fps = fps
+        self.start = start
+        self.labels = {}  # name -> (text, rendered label)
+        self.dirty = None  # rects drawn last time, None until the first full draw
+
+    def due(self, frame):
+        """
+        :param frame: number of the simulated frame
+        :return: if this frame should be drawn
+        """
+        return frame >= self.start and frame % self.every == 0
+
+    def label(self, name, text):
+        cached = self.labels.get(name)
+        if cached is None or cached[0] != text:
+            cached = self.labels[name] = (text, assets.stat_font().render(text, 1, (255, 255, 255)))
+        return cached[1]
+
+    def draw(self, flock, pipes, base, score, gen, pipe_ind):
+        win = self.win
+        if self.dirty is None:
+            win.blit(assets.background(), (0, 0))  # This draws the background image
+        else:
+            for rect in self.dirty:
+                win.blit(assets.background(), rect, rect)  # paint the background back over what we drew last time
+
+        rects = []
+        for pipe in pipes:
+            rects += pipe.draw(win)
+        rects += base.draw(win)
+
+        alive = flock.alive_indices()
+        score_label = self.label("score", "Score: " + str(score))
+        rects.append(win.blit(score_label, (MIN_WIDTH - score_label.get_width() - 15, 10)))
+        rects.append(win.blit(self.label("gens", "Gens: " + str(max(gen, 1) - 1)), (10, 10)))
+        rects.append(win.blit(self.label("alive", "Alive: " + str(len(alive))), (10, 50)))
+
+        if self.top_k is not None and len(alive) > self.top_k:
+            alive = alive[np.argpartition(-flock.fitness[alive], self.top_k - 1)[:self.top_k]]
+
+        bird_rects = []
+        for i in alive:
+            if DRAW_LINES:
+                img = assets.bird_images()[flock.frame[i]]
+                center = (flock.x + img.get_width() / 2, flock.y[i] + img.get_height() / 2)
+                pipe = pipes[pipe_ind]
+                bird_rects.append(pygame.draw.line(win, (255, 0, 0), center,
+                                                   (pipe.x + pipe.PIPE_TOP.get_width() / 2, pipe.height), 5))
+                bird_rects.append(pygame.draw.line(win, (255, 0, 0), center,
+                                                   (pipe.x + pipe.PIPE_BOTTOM.get_width() / 2, pipe.bottom), 5))
+            bird_rects.append(bird_atlas().blit(win, flock.frame[i], (flock.x, flock.y[i]), flock.tilt[i]))
+        if bird_rects:
+            # the birds all share one x, so one rect around all of them costs little extra area
+            rects.append(bird_rects[0].unionall(bird_rects))
+
+        if self.dirty is None:
+            pygame.display.update()  # This updates the display
+        else:
+            pygame.display.update(self.dirty + rects)  # only what was drawn last time or now
+        self.dirty = rects
 
-    winner = p.run(eval_genomes, 50)
+
+def eval_genomes(genomes, config):
+    ge = []
+
+    global gen
+    gen += 1
+
+    for gid, g in genomes:  # g is the genome
+        g.fitness = 0
+        ge.append(g)
+    net = BatchNetwork.create(ge, config, COMPILE_CACHE)  # the networks of the whole generation in one object
+
+    start = time.perf_counter()
+    jumps = [] if RECORDER is not None else None
+    if COURSES > 1:
+        seeds = generation_seeds(COURSES)
+        course_fitness, frames, score, stopped = play_courses(net, seeds, BUDGET.frames, TIMER, DECIDE_EVERY,
+                                                              BUDGET.score, jumps)
+        fitness = aggregate_fitness(course_fitness, COURSE_STAT)
+    else:
+        renderer = None
+        if not HEADLESS:
+            win = pygame.display.set_mode(
+                (MIN_WIDTH, MIN_HEIGHT)
+            )  # Create a new window with width 500 and height 800
+            renderer = Renderer(win, RENDER_EVERY, TOP_K)
+
+        seeds = [generation_seed()]
+        fitness, frames, score, stopped = play(net, seeds[0], renderer, BUDGET.frames, TIMER, DECIDE_EVERY,
+                                               BUDGET.score, STOP_FITNESS, jumps, LIVE)
+        course_fitness = [fitness]
+    BUDGET.record(stopped, frames)
+    if STATS is not None:
+        STATS.record(frames, score)
+    if RECORDER is not None:
+        record_generation(seeds, [gid for gid, g in genomes], course_fitness, frames,
+                          split_courses(pack_jumps(jumps), len(ge), len(seeds)))
+    for g, f in zip(ge, fitness):
+        g.fitness = float(f)
+
+    elapsed = time.perf_counter() - start
+    print("Simulated {0} frames in {1:.3f} sec ({2:.1f} frames/sec)".format(
+        frames, elapsed, frames / elapsed if elapsed > 0 else float("inf")))
+
+
+def generation_seed():
+    """
+    :return: the course seed for the next generation
+    """
+    if SEED is not None:
+        return SEED
+    return random.randrange(2 ** 32)  # drawn from random, so seeding random still reproduces a run
+
+
+def generation_seeds(count):
+    """
+    :param count: number of courses
+    :return: list of the course seeds for the next generation
+    """
+    if SEED is not None:
+        return [SEED + k for k in range(count)]  # the first one is the course of a single course run
+    return [random.randrange(2 ** 32) for _ in range(count)]
+
+
+def record_generation(seeds, keys, course_fitness, frames, course_jumps):
+    """
+    Append the episodes of this generation to the replay log, one for every course
+    :param seeds: course seeds
+    :param keys: genome key of every bird
+    :param course_fitness: fitness of every bird on every course
+    :param frames: number of frames played
+    :param course_jumps: array of JUMP records of every course
+    :return: None
+    """
+    for seed, fitness, jumps in zip(seeds, course_fitness, course_jumps):
+        RECORDER.write(gen - 1, seed, keys, fitness, frames, jumps, DECIDE_EVERY)  # gen - 1 is neat's number
+
+
+def eval_genome_chunk(genomes, config, seed, max_frames=None, decide_every=1, max_score=None, stop_fitness=None,
+                      record=False):
+    """
+    Worker side of ChunkEvaluator, plays one headless episode for a chunk of genomes
+    :param genomes: list of genomes
+    :param config: neat config
+    :param seed: seed of the pipe course shared by every chunk of the generation, or a list of seeds
+                 to play every genome on all of those courses
+    :param max_frames: stop after this many frames
+    :param decide_every: run the networks every this many frames
+    :param max_score: stop once this many pipes were passed
+    :param stop_fitness: stop as soon as a bird of the chunk has this fitness, only for a single course
+    :param record: also return the jumps of the birds for the replay log
+    :return: (list with the fitness of every genome on every course, frames played, pipes passed,
+              why play stopped early,
+              list with the JUMP records of every course or None, compile cache hits, compile cache misses)
+    """
+    hits, misses = COMPILE_CACHE.hits, COMPILE_CACHE.misses
+    net = BatchNetwork.create(genomes, config, COMPILE_CACHE)
+    jumps = [] if record else None
+    seeds = seed if isinstance(seed, list) else [seed]
+    if isinstance(seed, list):
+        fitness, frames, score, stopped = play_courses(net, seeds, max_frames=max_frames,
+                                                       decide_every=decide_every, max_score=max_score, jumps=jumps)
+    else:
+        fitness, frames, score, stopped = play(net, seed, max_frames=max_frames, decide_every=decide_every,
+                                               max_score=max_score, stop_fitness=stop_fitness, jumps=jumps)
+        fitness = [fitness]
+    recorded = split_courses(pack_jumps(jumps), len(genomes), len(seeds)) if record else None
+    return ([[float(f) for f in course] for course in fitness], frames, score, stopped, recorded,
+            COMPILE_CACHE.hits - hits, COMPILE_CACHE.misses - misses)
+
+
+class ChunkEvaluator:
+    """
+    Evaluates a generation in chunks played by eval_genome_chunk somewhere else.
+    The genomes are split in chunks and every chunk plays its own episode on the
+    same seeded course, which gives the same fitness as playing them all together
+    in eval_genomes. Subclasses hand the chunks out with submit and tell how many
+    workers there are with num_workers.
+    """
+    chunks_per_worker = 1  # by default every worker gets one chunk
+
+    def __init__(self, chunk_size=None, timeout=None):
+        """
+        :param chunk_size: genomes per job, by default the population is split evenly over the workers
+        :param timeout: seconds to wait for a job before giving up
+        """
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+
+    def evaluate(self, genomes, config):
+        global gen
+        gen += 1
+
+        start = time.perf_counter()
+        self.evaluate_course(genomes, config, generation_seeds(COURSES) if COURSES > 1 else generation_seed())
+        print("Evaluated {0} genomes on {1} workers in {2:.3f} sec".format(
+            len(genomes), self.num_workers, time.perf_counter() - start))
+
+    def evaluate_course(self, genomes, config, seed):
+        """
+        :param seed: course seed, or a list of seeds to play every genome on several courses
+        """
+        size = self.chunk_size or max(1, math.ceil(len(genomes) / (self.num_workers * self.chunks_per_worker)))
+        chunks = [genomes[i:i + size] for i in range(0, len(genomes), size)]
+
+        jobs = []
+        for chunk in chunks:
+            jobs.append(self.submit(([g for gid, g in chunk], config, seed, BUDGET.frames, DECIDE_EVERY,
+                                     BUDGET.score, STOP_FITNESS, RECORDER is not None)))
+
+        seeds = seed if isinstance(seed, list) else [seed]
+        course_fitness = np.zeros((len(seeds), len(genomes)))
+        parts = [[] for _ in seeds]  # (jumps, first bird) of every chunk, per course
+        played = 0
+        first = 0
+        for job, chunk in zip(jobs, chunks):
+            fitness, frames, score, stopped, recorded, hits, misses = job.get(timeout=self.timeout)
+            course_fitness[:, first:first + len(chunk)] = fitness
+            if recorded is not None:
+                for course_parts, jumps in zip(parts, recorded):
+                    course_parts.append((jumps, first))
+            BUDGET.record(stopped, frames)
+            if STATS is not None:
+                STATS.record(frames, score)
+            # the workers keep their own caches, their counts are added up here for the reporter
+            COMPILE_CACHE.hits += hits
+            COMPILE_CACHE.misses += misses
+            played = max(played, frames)
+            first += len(chunk)
+
+        # assign the fitness back to each genome
+        fitness = aggregate_fitness(course_fitness, COURSE_STAT) if len(seeds) > 1 else course_fitness[0]
+        for (gid, genome), f in zip(genomes, fitness):
+            genome.fitness = float(f)
+
+        if RECORDER is not None:
+            record_generation(seeds, [gid for gid, g in genomes], course_fitness, played,
+                              [merge_jumps(course_parts) for course_parts in parts])
+
+    def submit(self, args):
+        """
+        Start playing a chunk
+        :param args: arguments of eval_genome_chunk
+        :return: handle whose get(timeout) returns what eval_genome_chunk returned
+        """
+        raise NotImplementedError
+
+
+class EpisodeEvaluator(ChunkEvaluator, neat.ParallelEvaluator):
+    """
+    Evaluates a generation in a process pool, one chunk per worker
+    """
+
+    def __init__(self, num_workers, chunk_size=None, timeout=None):
+        """
+        :param num_workers: number of worker processes
+        :param chunk_size: genomes per job, by default the population is split evenly over the workers
+        :param timeout: seconds to wait for a job before giving up
+        """
+        neat.ParallelEvaluator.__init__(self, num_workers, eval_genome_chunk, timeout)
+        ChunkEvaluator.__init__(self, chunk_size, timeout)
+
+    def submit(self, args):
+        return self.pool.apply_async(self.eval_function, args)
+
+
+class RemoteEvaluator(ChunkEvaluator):
+    """
+    Evaluates a generation on worker processes that connect over TCP, on this
+    machine or others, see remote.py. The chunks and their fitness are the same
+    as with EpisodeEvaluator, there are just more of them so a chunk that has to
+    be played again by another worker costs less.
+    """
+    chunks_per_worker = 4
+
+    def __init__(self, address, authkey=DEFAULT_AUTHKEY, local_workers=0, chunk_size=None, timeout=None,
+                 job_timeout=None):
+        """
+        :param address: (host, port) to listen on for workers
+        :param authkey: key the workers have to know to connect, None for a random one
+        :param local_workers: start this many worker processes on this machine
+        :param chunk_size: genomes per batch, by default every worker gets chunks_per_worker batches
+        :param timeout: seconds to wait for a batch, including the times it is handed out again
+        :param job_timeout: seconds a worker may take for a batch before it is given to another one
+        """
+        ChunkEvaluator.__init__(self, chunk_size, timeout)
+        self.coordinator = Coordinator(address, authkey, job_timeout)
+        self.local = []
+        context = multiprocessing.get_context("spawn")  # forking would copy the coordinator's threads
+        for _ in range(local_workers):
+            process = context.Process(target=serve, args=(self.coordinator.address, self.coordinator.authkey),
+                                      daemon=True)
+            process.start()
+            self.local.append(process)
+
+    @property
+    def num_workers(self):
+        return self.coordinator.num_workers
+
+    def evaluate(self, genomes, config):
+        self.coordinator.wait_for_workers()
+        self.coordinator.reset_stats()
+        ChunkEvaluator.evaluate(self, genomes, config)
+        self.coordinator.report()
+
+    def submit(self, args):
+        return self.coordinator.submit(args, len(args[0]))
+
+    def close(self):
+        """
+        Tell the workers to exit and stop listening
+        :return: None
+        """
+        self.coordinator.close()
+        for process in self.local:
+            process.join(timeout=5)
+
+
+def scaling_report(config_path, max_workers, seed=0):
+    """
+    Time one generation of the same genomes on the same course with 1 to max_workers workers
+    :param config_path: path to the neat config file
+    :param max_workers: largest number of workers to try
+    :param seed: seed of the pipe course
+    :return: None
+    """
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                                config_path)
+    genomes = list(neat.Population(config).population.items())
+
+    print("workers   seconds   speedup   efficiency")
+    base_time = None
+    base_fitness = None
+    for workers in range(1, max_workers + 1):
+        evaluator = EpisodeEvaluator(workers)
+        start = time.perf_counter()
+        evaluator.evaluate_course(genomes, config, seed)
+        elapsed = time.perf_counter() - start
+        evaluator.pool.close()
+        evaluator.pool.join()
+
+        fitness = [g.fitness for gid, g in genomes]
+        if base_time is None:
+            base_time, base_fitness = elapsed, fitness
+        elif fitness != base_fitness:
+            raise RuntimeError("fitness changed with {0} workers".format(workers))
+        print("{0:7d} {1:9.3f} {2:9.2f} {3:11.0%}".format(
+            workers, elapsed, base_time / elapsed, base_time / elapsed / workers))
+
+
+def run(config_path, headless=False, workers=1, seed=None, timing=False, histogram=False,
+        render_every=1, top_k=None, decide_every=1, max_frames=None, max_score=None, budget_growth=None,
+        budget_limit=None, early_stop=True, courses=1, course_stat="mean", record=None, checkpoint_every=None,
+        checkpoint_prefix="neat-checkpoint-", resume=None, stats=None, live=None, remote=None, local_workers=0,
+        authkey=DEFAULT_AUTHKEY):
+    """
+    Train the birds with NEAT.
+    :param config_path: path to the neat config file
+    :param headless: run without a window and without the 30 fps cap
+    :param workers: evaluate in a pool of this many processes (always headless) when more than 1
+    :param seed: play every generation on the course with this seed instead of a new course each time
+    :param timing: print how long each phase of the loop took every generation (not for workers > 1)
+    :param histogram: with timing, also print a histogram of the frame times
+    :param render_every: when not headless, only draw every Nth frame and simulate the others at full speed
+    :param top_k: when not headless, only draw this many of the fittest birds
+    :param decide_every: let the networks decide every this many frames instead of every frame
+    :param max_frames: frame budget of a generation, None for no limit
+    :param max_score: stop a generation once this many pipes were passed, None for no limit
+    :param budget_growth: grow the frame budget by this factor whenever a generation hits it
+    :param budget_limit: never grow the frame budget beyond this many frames
+    :param early_stop: end a generation as soon as a bird reaches the fitness_threshold of the config
+    :param courses: play every genome on this many courses at once (always headless) when more than 1
+    :param course_stat: how to combine the fitness of the courses: mean, min, median or a quantile
+    :param record: path of a replay log to append every episode to, see replay.py
+    :param checkpoint_every: save a checkpoint every this many generations, None to not save any
+    :param checkpoint_prefix: checkpoints are saved as this prefix followed by the generation
+    :param resume: checkpoint to continue from instead of starting a new population. Its reporters,
+                   budget and statistics are used, the other arguments apply as given
+    :param stats: JSONL or CSV file to stream the metrics of every generation to. Replaces the
+                  statistics reporter, which keeps every generation in memory, and the verbose output
+    :param live: publish every frame to shared memory under this name, watch it with live_view.py.
+                 Only a single course played in this process can be published
+    :param remote: (host, port) to listen on for workers on other machines, they evaluate the genomes
+                   instead of this process, see remote.py
+    :param local_workers: also start this many workers on this machine when evaluating remotely
+    :param authkey: key the remote workers have to know to connect, None for a random one that is printed
+    :return: None
+    """
+    global gen, HEADLESS, SEED, TIMER, RENDER_EVERY, TOP_K, DECIDE_EVERY, BUDGET, STOP_FITNESS, COURSES, \
+        COURSE_STAT, RECORDER, COMPILE_CACHE, STATS, LIVE
+    HEADLESS = headless
+    SEED = seed
+    RENDER_EVERY = render_every
+    TOP_K = top_k
+    DECIDE_EVERY = decide_every
+    BUDGET = EpisodeBudget(max_frames, max_score, budget_growth, budget_limit)
+    if course_stat not in ("mean", "min", "median") and not 0 <= float(course_stat) <= 1:
+        raise ValueError("course_stat must be mean, min, median or a quantile, got {0!r}".format(course_stat))
+    COURSES = courses
+    COURSE_STAT = course_stat
+    RECORDER = ReplayWriter(record) if record else None
+    STATS = None  # set below, or restored with the other reporters
+    TIMER = NULL_TIMER  # also, a timer left from an earlier run would cost time with nothing reporting it
+
+    if resume:
+        p, reporters, best, state = TrainingCheckpointer.restore_checkpoint(resume)
+        config = p.config
+        gen = state.get("gen", p.generation)
+        for reporter in reporters:
+            p.add_reporter(reporter)
+            # the globals the evaluation uses have to be the restored reporters' objects
+            if isinstance(reporter, EpisodeBudget):
+                BUDGET = reporter
+            elif isinstance(reporter, CompileCacheReporter):
+                COMPILE_CACHE = reporter.cache
+            elif isinstance(reporter, TimingReporter):
+                TIMER = reporter.timer
+            elif isinstance(reporter, StatsLog):
+                STATS = reporter
+        print("Resuming from {0} at generation {1}".format(resume, p.generation))
+    else:
+        config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                    neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                                    config_path)
+        p = neat.Population(config)
+        best = None
+        gen = 0  # a fresh run counts from the start, also after another run in this process
+
+        if stats:
+            STATS = StatsLog(stats)
+            p.add_reporter(neat.StdOutReporter(False))
+            p.add_reporter(STATS)
+        else:
+            p.add_reporter(neat.StdOutReporter(True))
+            p.add_reporter(neat.StatisticsReporter())
+        p.add_reporter(CompileCacheReporter(COMPILE_CACHE))
+        p.add_reporter(BUDGET)
+        if timing:
+            timing_reporter = TimingReporter(histogram)
+            p.add_reporter(timing_reporter)
+            TIMER = timing_reporter.timer
+
+    LIVE = None
+    if live:
+        if workers > 1 or courses > 1 or remote:
+            raise ValueError("live viewing needs a single course played without workers")
+        LIVE = SnapshotRing.create(live, 2 * config.pop_size)  # room for all of them, also if a generation grows
+        print("Publishing frames as {0}, watch them with: python live_view.py {0}".format(live))
+
+    # with the max criterion one bird over the threshold ends the run after this generation anyway
+    STOP_FITNESS = None
+    if early_stop and config.fitness_criterion == "max" and not getattr(config, "no_fitness_termination", False):
+        STOP_FITNESS = config.fitness_threshold
+
+    checkpointer = None
+    if checkpoint_every:
+        checkpointer = TrainingCheckpointer(p, checkpoint_every, filename_prefix=checkpoint_prefix,
+                                            state=lambda: {"gen": gen})
+        checkpointer.best = best
+        checkpointer.last_generation_checkpoint = p.generation - 1
+        p.add_reporter(checkpointer)
+
+    generations = 50 - p.generation  # 50 in total, also when resumed
+    # the files and the live ring are closed also when training fails or is interrupted,
+    # so the viewers see that it ended and what was written so far is complete
+    try:
+        if remote:
+            evaluator = RemoteEvaluator(remote, authkey, local_workers)
+            try:
+                winner = p.run(evaluator.evaluate, generations)
+            finally:
+                evaluator.close()
+        elif workers > 1:
+            evaluator = EpisodeEvaluator(workers)
+            winner = p.run(evaluator.evaluate, generations)
+        else:
+            winner = p.run(eval_genomes, generations)
+    finally:
+        if checkpointer is not None:
+            checkpointer.wait()
+
+        if LIVE is not None:
+            LIVE.close()
+
+        if STATS is not None:
+            STATS.close()
+            print("Generation metrics written to {0}".format(STATS.path))
+
+        if RECORDER is not None:
+            RECORDER.close()
+            print("Episodes recorded in {0}, watch the last one with: python replay.py {0}".format(record))
 
     # show final stats
     print('\nBest genome:\n{!s}'.format(winner))
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train flappy bird with NEAT")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate as fast as possible without opening a window")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="evaluate genomes in a pool of this many processes")
+    parser.add_argument("--seed", type=int,
+                        help="play every generation on the same pipe course with this seed")
+    parser.add_argument("--render-every", type=int, default=1, metavar="N",
+                        help="watch while training: only draw every Nth frame")
+    parser.add_argument("--top-k", type=int, metavar="K",
+                        help="only draw the K fittest living birds")
+    parser.add_argument("--decide-every", type=int, default=1, metavar="K",
+                        help="run the networks every K frames, birds coast in between")
+    parser.add_argument("--max-frames", type=int, metavar="N",
+                        help="frame budget of a generation")
+    parser.add_argument("--max-score", type=int, metavar="N",
+                        help="end a generation once this many pipes were passed")
+    parser.add_argument("--budget-growth", type=float, metavar="F",
+                        help="grow the frame budget by this factor every time a generation hits it")
+    parser.add_argument("--budget-limit", type=int, metavar="N",
+                        help="never grow the frame budget beyond this many frames")
+    parser.add_argument("--no-early-stop", action="store_true",
+                        help="play a generation out even when a bird reached the fitness threshold")
+    parser.add_argument("--courses", type=int, default=1, metavar="K",
+                        help="play every genome on K courses at once, headless")
+    parser.add_argument("--course-stat", default="mean",
+                        help="combine the fitness of the courses with mean, min, median or a quantile like 0.25")
+    parser.add_argument("--record", metavar="PATH",
+                        help="append every episode to a replay log, watch it with replay.py")
+    parser.add_argument("--stats", metavar="PATH",
+                        help="stream the metrics of every generation to a .jsonl or .csv file")
+    parser.add_argument("--remote", type=parse_address, metavar="HOST:PORT",
+                        help="listen here for workers started with remote.py and let them evaluate")
+    parser.add_argument("--local-workers", type=int, default=0, metavar="N",
+                        help="with --remote, also start N workers on this machine")
+    parser.add_argument("--authkey", default=DEFAULT_AUTHKEY,
+                        help="key remote workers need to connect, FLAPPY_AUTHKEY by default, "
+                             "a random one is printed if neither is given")
+    parser.add_argument("--live", metavar="NAME",
+                        help="publish every frame to shared memory for live_view.py NAME")
+    parser.add_argument("--checkpoint-every", type=int, metavar="N",
+                        help="save a checkpoint every N generations")
+    parser.add_argument("--checkpoint-prefix", default="neat-checkpoint-",
+                        help="checkpoint file names, the generation is added to the end")
+    parser.add_argument("--resume", metavar="CHECKPOINT",
+                        help="continue training from a checkpoint")
+    parser.add_argument("--timing", action="store_true",
+                        help="print a per-phase timing breakdown every generation")
+    parser.add_argument("--histogram", action="store_true",
+                        help="with --timing, also print a histogram of the frame times")
+    parser.add_argument("--scaling", type=int, metavar="N",
+                        help="print how one generation scales from 1 to N workers and exit")
+    args = parser.parse_args()
+
     local_dir = os.path.dirname(__file__)
     config_path = os.path.join(local_dir, "config.txt")
-    run(config_path)
+    if args.scaling:
+        scaling_report(config_path, args.scaling)
+    else:
+        run(config_path, headless=args.headless, workers=args.workers, seed=args.seed,
+            timing=args.timing, histogram=args.histogram, render_every=args.render_every, top_k=args.top_k,
+            decide_every=args.decide_every, max_frames=args.max_frames, max_score=args.max_score,
+            budget_growth=args.budget_growth, budget_limit=args.budget_limit, early_stop=not args.no_early_stop,
+            courses=args.courses, course_stat=args.course_stat, record=args.record,
+            checkpoint_every=args.checkpoint_every, checkpoint_prefix=args.checkpoint_prefix, resume=args.resume,
+            stats=args.stats, live=args.live, remote=args.remote, local_workers=args.local_workers,
+            authkey=args.authkey)
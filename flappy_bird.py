@@ -1,243 +1,299 @@
-import pygame
-import neat
+"""
+The game for a human to play: space, up or a mouse click flaps.
+
+Physics runs at a fixed SIM_RATE steps per second, the rate the speeds and
+gravity of the game are made for, however fast the display is. Every drawn
+frame adds the time that passed to an accumulator and runs as many physics
+steps as fit in it, so a slow frame doesn't slow the game down. Frames are
+drawn at the refresh rate of the display, in between two physics steps, so
+the motion stays smooth on 60, 120 or 144 Hz displays.
+
+Input is read at the start of every drawn frame and the jump is applied right
+away. The loop keeps the frame times and the input-to-photon latency of every
+jump and prints their percentiles when the window is closed.
+
+    python flappy_bird.py --show-stats
+"""
+import argparse
+import collections
 import time
-import os
-import random
-
-pygame.font.init()  # init font
-
-MIN_WIDTH = 500
-MIN_HEIGHT = 800
-FLOOR = 730
-STAT_FONT = pygame.font.SysFont("comicsans", 50)
-END_FONT = pygame.font.SysFont("comicsans", 70)
-
-BIRD_IMGS = [
-    pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "bird1.png"))),
-    pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "bird2.png"))),
-    pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "bird3.png"))),
-]
-PIPE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "pipe.png")))
-BASE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "base.png")))
-BG_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("imgs", "bg.png")))
-
-
-class Bird:
-    IMGS = BIRD_IMGS
-    MAX_ROTATION = 25  # How much the bird will tilt
-    ROT_VEL = 20  # How much we will rotate on each frame
-    ANIMATION_TIME = 5  # How long each bird animation will last
-
-    # This is the constructor, it is called when we create a new bird
-    def __init__(self, x, y):
-        self.x = x  # Starting x position
-        self.y = y  # Starting y position
-        self.tilt = 0  # Starting tilt
-        self.tick_count = 0  # How many ticks since last jump
-        self.vel = 0  # Starting velocity
-        self.height = self.y  # Starting height
-        self.img_count = (
-            0  # Which image we are currently showing, keeps track of the animation
-        )
-        self.img = self.IMGS[0]  # Starting image
-
-    def jump(self):
-        self.vel = -10.5  # Negative velocity means up
-        self.tick_count = 0  # Reset tick count
-        self.height = self.y  # Reset height
-
-    def move(self):
-        self.tick_count += 1  # Increment tick count
-
-        d = self.vel * self.tick_count + 1.5 * self.tick_count**2
-        # How much we are moving up or down this frame
-
-        if d >= 16:  # if we are moving down more than 16 pixels
-            d = 16  # this changes the value to 16 so that we don't move down too fast
-
-        if d < 0:  # if we are moving up
-            d -= 2  # move up a little more so that we don't move up too fast
-
-        self.y = (
-            self.y + d
-        )  # what this does is it moves the bird up or down depending on the value of d
-
-        if d < 50 or self.y < self.height + 50:
-            # if we are moving up or if we are above the height we started at
-            # and if we are not tilted too far down
-            if self.tilt < -self.MAX_ROTATION:  # if we are tilted too far down
-                self.tilt = (
-                    -self.MAX_ROTATION
-                )  # set tilt to max rotation so that we don't tilt too far down
-            else:
-                if self.tilt > -90:
-                    self.tilt -= self.ROT_VEL  # it tilts the bird down
-
-    def draw(self, win):
-        self.img_count += 1  # Increment image count
-
-        # For animation of bird, loop through three images
-        if self.img_count <= self.ANIMATION_TIME:
-            self.img = self.IMGS[0]
-        elif self.img_count <= self.ANIMATION_TIME * 2:
-            self.img = self.IMGS[1]
-        elif self.img_count <= self.ANIMATION_TIME * 3:
-            self.img = self.IMGS[2]
-        elif self.img_count <= self.ANIMATION_TIME * 4:
-            self.img = self.IMGS[1]
-        elif self.img_count == self.ANIMATION_TIME * 4 + 1:
-            self.img = self.IMGS[0]
-            self.img_count = 0
-
-        # so when bird is nose diving it isn't flapping
-        if self.tilt <= -80:
-            self.img = self.IMGS[1]
-            self.img_count = self.ANIMATION_TIME * 2
-
-        rotated_image = pygame.transform.rotate(self.img, self.tilt)
-        new_rect = rotated_image.get_rect(
-            center=self.img.get_rect(topleft=(self.x, self.y)).center
-        )
-        win.blit(rotated_image, new_rect.topleft)
-
-    def get_mask(self):
-        return pygame.mask.from_surface(self.img)  # This is for pixel perfect collision
-
-
-class Pipe:
-    GAP = 200
-    VEL = 5
-
-    def __init__(self, x):
-        self.x = x  # x position of the pipe
-        self.height = 0  # y position of the pipe
-
-        self.top = 0  # position of the top pipe
-        self.bottom = 0  # position of the bottom pipe
-        self.PIPE_TOP = pygame.transform.flip(
-            PIPE_IMG, False, True
-        )  # flips the pipe image to make it face down
-        self.PIPE_BOTTOM = PIPE_IMG  # pipe image
-
-        self.passed = False
-        self.set_height()
-
-    def set_height(self):
-        self.height = random.randrange(
-            50, 450
-        )  # generates a random height for the pipe between 50 and 450
-        self.top = self.height - self.PIPE_TOP.get_height()
-        self.bottom = self.height + self.GAP
-
-    def move(self):
-        self.x -= self.VEL
-
-    def draw(self, win):
-        win.blit(self.PIPE_TOP, (self.x, self.top))
-        win.blit(self.PIPE_BOTTOM, (self.x, self.bottom))
-
-    def collide(self, bird):
-        bird_mask = bird.get_mask()  # gets the mask of the bird
-        top_mask = pygame.mask.from_surface(
-            self.PIPE_TOP
-        )  # gets the mask of the top pipe
-        bottom_mask = pygame.mask.from_surface(
-            self.PIPE_BOTTOM
-        )  # gets the mask of the bottom pipe
-
-        top_offset = (self.x - bird.x, self.top - round(bird.y))
-        # This is the distance between the bird and the top pipe
-        bottom_offset = (self.x - bird.x, self.bottom - round(bird.y))
-        # This is the distance between the bird and the bottom pipe
-
-        b_point = bird_mask.overlap(bottom_mask, bottom_offset)
-        # This is the point of collision between the bird and the bottom pipe
-        t_point = bird_mask.overlap(top_mask, top_offset)
-        # This is the point of collision between the bird and the top pipe
-
-        if t_point or b_point:
-            # if either of the points are not None
-            return True
-        return False
-
-
-class Base:
-    VEL = 5
-    WIDTH = BASE_IMG.get_width()
-    IMG = BASE_IMG
-
-    def __init__(self, y):
-        self.y = y
-        self.x1 = 0
-        self.x2 = self.WIDTH
-
-    def move(self):
-        self.x1 -= self.VEL
-        self.x2 -= self.VEL
-
-        # This makes the base move infinitely
-        if self.x1 + self.WIDTH < 0:  # if the first base image is off the screen
-            self.x1 = (
-                self.x2 + self.WIDTH
-            )  # move the first base image to the right of the second base image
-        if self.x2 + self.WIDTH < 0:  # if the second base image is off the screen
-            self.x2 = (
-                self.x1 + self.WIDTH
-            )  # move the second base image to the right of the first base image
-
-    def draw(self, win):
-        win.blit(self.IMG, (self.x1, self.y))
-        win.blit(self.IMG, (self.x2, self.y))
-
-
-def draw_window(win, bird, pipes, base, score):
-    win.blit(BG_IMG, (0, 0))  # This draws the background image
-    for pipe in pipes:
-        pipe.draw(win)
+import warnings
+
+import numpy as np
+import pygame
 
-    base.draw(win)
+import assets
+from course import Course
+from game import BIRD_X, BIRD_Y, FIRST_PIPE_X, FLOOR, MIN_HEIGHT, MIN_WIDTH, PIPE_X, Base, Bird, PipePool, bird_atlas
+
+SIM_RATE = 30  # physics steps per second
+STEP = 1 / SIM_RATE
+MAX_FRAME_TIME = 0.25  # a longer stall (like dragging the window) pauses the game instead of being caught up on
+FALLBACK_FPS = 144  # frame cap when the display can't sync to its refresh
+MIN_REFRESH_TIME = 1 / 500  # flips that come back faster than this didn't wait for any real display
+SYNC_PROBES = 5  # flips timed to tell if the display really syncs
+JUMP_KEYS = (pygame.K_SPACE, pygame.K_UP)
+PERCENTILES = (50, 90, 99, 100)
+
+
+class LoopStats:
+    """
+    Frame times and input-to-photon latencies of the game loop. The latency of
+    a jump runs from the frame that read the input to the flip of the first
+    frame drawn after a physics step moved the bird with it. The display shows
+    that frame on its next scanout, which software can't see.
+    """
+
+    def __init__(self, keep=10000):
+        """
+        :param keep: number of most recent frames and jumps to keep
+        """
+        self.frame_times = collections.deque(maxlen=keep)
+        self.latencies = collections.deque(maxlen=keep)
+        self.last_flip = None
+        self.read = None  # when the last jump was read, until it is on the screen
+        self.stepped = False  # if a physics step ran since that jump was read
+
+    def jumped(self, now):
+        if self.read is None:
+            self.read = now  # a second jump before the first one is shown doesn't reset the clock
+            self.stepped = False
+
+    def step(self):
+        if self.read is not None:
+            self.stepped = True
+
+    def flipped(self, now):
+        """
+        Called right after every display flip
+        :param now: time after the flip
+        :return: None
+        """
+        if self.last_flip is not None:
+            self.frame_times.append(now - self.last_flip)
+        self.last_flip = now
+        if self.stepped:
+            self.latencies.append(now - self.read)
+            self.read = None
+            self.stepped = False
+
+    @staticmethod
+    def percentiles(values):
+        """
+        :return: array with the PERCENTILES of the values in milliseconds
+        """
+        return 1000 * np.percentile(np.fromiter(values, float, len(values)), PERCENTILES)
+
+    def summary(self):
+        """
+        :return: lines with the percentiles of the frame times and latencies
+        """
+        lines = []
+        for name, values in (("frame time", self.frame_times), ("input to photon", self.latencies)):
+            if not values:
+                lines.append("{0}: no samples".format(name))
+                continue
+            p50, p90, p99, most = self.percentiles(values)
+            lines.append("{0}: p50 {1:.1f} ms  p90 {2:.1f} ms  p99 {3:.1f} ms  max {4:.1f} ms  ({5} samples)".format(
+                name, p50, p90, p99, most, len(values)))
+        return lines
+
+
+def draw_window(win, bird, pipes, base, score, alpha=1.0, previous_y=None, overlay=None):
+    """
+    Draw the game in between two physics steps
+    :param alpha: how far along from the previous physics step (0) to the last one (1)
+    :param previous_y: y of the bird at the previous physics step, None to draw it where it is
+    :param overlay: text drawn in the top left corner, None for none
+    :return: None
+    """
+    win.blit(assets.opaque_background(), (0, 0))  # This draws the background image
+
+    # pipes and ground all scroll at the same speed, so a step ago they were this much further right
+    shift = round((1 - alpha) * base.VEL)
+    for pipe in pipes:
+        win.blit(pipe.PIPE_TOP, (pipe.x + shift, pipe.top))
+        win.blit(pipe.PIPE_BOTTOM, (pipe.x + shift, pipe.bottom))
+    win.blit(base.IMG, (base.x1 + shift, base.y))
+    win.blit(base.IMG, (base.x2 + shift, base.y))
 
-    score_label = STAT_FONT.render("Score: " + str(score), 1, (255, 255, 255))
+    score_label = assets.stat_font().render("Score: " + str(score), 1, (255, 255, 255))
     win.blit(score_label, (MIN_WIDTH - score_label.get_width() - 15, 10))
+    if overlay is not None:
+        win.blit(assets.font(20).render(overlay, 1, (255, 255, 255)), (10, 10))
 
-    bird.draw(win)
+    y = bird.y if previous_y is None else previous_y + (bird.y - previous_y) * alpha
+    bird_atlas().blit(win, bird.frame, (bird.x, y), bird.tilt)
 
     pygame.display.update()  # This updates the display
 
 
-def main():
-    bird = Bird(230, 350)  # Create a new bird object with starting position (200, 200)
-    base = Base(730)  # Create a new base object with starting position (730, 0)
-    pipes = [Pipe(700)]  # Create a new pipe object with starting position (700, 0)
-    win = pygame.display.set_mode(
-        (MIN_WIDTH, MIN_HEIGHT)
-    )  # Create a new window with width 500 and height 800
-    clock = (
-        pygame.time.Clock()
-    )  # this is a clock object that we will use to set the fps of the game
+def update(bird, pipes, base, pool, course, score):
+    """
+    Advance the pipes and the ground by one physics step and check the bird against them
+    :param pool: PipePool the pipes that leave the screen go back to
+    :param course: Course the heights of the new pipes come from
+    :return: (score, if the bird crashed)
+    """
+    base.move()  # we call the move function of the base object every frame
+    for pipe in pipes:
+        pipe.move()  # we call the move function of the pipe object every frame
 
+    crashed = bird.y + bird.img.get_height() >= FLOOR or bird.y < 0  # the floor or the ceiling
+    rem = []  # pipes that went off the screen, removed after the loop instead of while iterating
+    add_pipe = False
+    for pipe in pipes:
+        if pipe.collide(bird):
+            crashed = True
+        if pipe.x + pipe.PIPE_TOP.get_width() < 0:
+            rem.append(pipe)
+        if not pipe.passed and pipe.x < bird.x:
+            pipe.passed = True
+            add_pipe = True
+
+    if add_pipe:
+        score += 1
+        pipes.append(pool.get(PIPE_X, course[score]))  # a pipe is added for every point, so this is the next one
+
+    for r in rem:
+        pipes.remove(r)
+        pool.release(r)
+
+    bird.animate()  # flap the wings
+    return score, crashed
+
+
+def new_round(pipes, pool, course):
+    """
+    Put the pipes back at the start of the course
+    :return: (new bird, new base)
+    """
+    for pipe in pipes:
+        pool.release(pipe)
+    pipes[:] = [pool.get(FIRST_PIPE_X, course[0])]  # Create a new pipe object with starting position (700, 0)
+    return Bird(BIRD_X, BIRD_Y), Base(FLOOR)
+
+
+def open_window(fps):
+    """
+    :param fps: frames drawn per second at most, 0 to sync to the refresh rate of the display
+    :return: (window, frame cap for clock.tick, 0 when the flip waits for the display)
+    """
+    if fps == 0:
+        try:
+            # without a renderer that can sync pygame only warns, so the warning counts as a failure too
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                win = pygame.display.set_mode((MIN_WIDTH, MIN_HEIGHT), pygame.SCALED, vsync=1)
+            if not caught and syncs():
+                return win, 0
+        except pygame.error:
+            pass
+        print("The display can't sync to its refresh rate, drawing at most {0} fps".format(FALLBACK_FPS))
+        fps = FALLBACK_FPS
+    return pygame.display.set_mode((MIN_WIDTH, MIN_HEIGHT)), fps
+
+
+def syncs():
+    """
+    Some drivers accept vsync and then don't wait for the display at all, which
+    would run the game loop as fast as it can. Time a few flips of the empty
+    window to find out.
+    :return: if the flips wait for the refresh of the display
+    """
+    pygame.display.flip()  # the first flip can come back early, it doesn't wait for a previous frame
+    times = []
+    for _ in range(SYNC_PROBES):
+        start = time.perf_counter()
+        pygame.display.flip()
+        times.append(time.perf_counter() - start)
+    return np.median(times) >= MIN_REFRESH_TIME
+
+
+def main(seed=None, fps=0, show_stats=False, max_seconds=None):
+    """
+    Play until the window is closed, a crash starts a new round on the same course
+    :param seed: seed of the course, the same seed always gives the same pipe heights
+    :param fps: frames drawn per second at most, 0 to sync to the refresh rate of the display
+    :param show_stats: show the frame rate, frame time and latency in the window
+    :param max_seconds: stop after this long, None to play until the window is closed
+    :return: LoopStats of the session
+    """
+    course = Course(seed)
+    pool = PipePool()  # pipes that left the screen are used again for the new ones
+    win, fps = open_window(fps)
+    clock = pygame.time.Clock()
+    stats = LoopStats()
+
+    pipes = []
+    bird, base = new_round(pipes, pool, course)
     score = 0
+    started = False  # the game waits for the first jump, with the bird flapping in place
+    scrolled = False  # if the last physics step moved the pipes and the ground
+    previous_y = bird.y
+    overlay = None
+    overlay_due = 0.0
+
+    start = previous = time.perf_counter()
+    accumulator = 0.0
+    run = True
+    while run and (max_seconds is None or previous - start < max_seconds):
+        if fps:
+            clock.tick(fps)  # sleep before reading the input, not after, so it is as fresh as it can be
+
+        now = time.perf_counter()
+        accumulator += min(now - previous, MAX_FRAME_TIME)
+        previous = now
 
-    while True:
-        clock.tick(30)  # this sets the fps of the game to 30
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                quit()
-
-        # bird.move()  # we call the move function of the bird object every frame
-        base.move()  # we call the move function of the base object every frame
-        for pipe in pipes:
-            if pipe.collide(bird):
-                pass
-            if pipe.x + pipe.PIPE_TOP.get_width() < 0:
-                pipes.remove(pipe)
-            if not pipe.passed and pipe.x < bird.x:
-                pipe.passed = True
-                score += 1
-                pipes.append(Pipe(600))
-            pipe.move()  # we call the move function of the pipe object every frame
-        draw_window(win, bird, pipes, base, score)  # this draws the window every frame
-
-
-main()
+                run = False
+            if (event.type == pygame.KEYDOWN and event.key in JUMP_KEYS) or event.type == pygame.MOUSEBUTTONDOWN:
+                bird.jump()  # applied now, the next physics step already moves the bird up
+                started = True
+                stats.jumped(now)
+
+        while accumulator >= STEP:
+            accumulator -= STEP
+            previous_y = bird.y
+            scrolled = started
+            if not started:
+                bird.animate()  # nothing moves before the first jump, the pipes can't hit the bird
+                continue
+            bird.move()
+            score, crashed = update(bird, pipes, base, pool, course, score)
+            stats.step()
+            if crashed:
+                print("Score: {0}".format(score))
+                bird, base = new_round(pipes, pool, course)
+                score = 0
+                started = scrolled = False
+                previous_y = bird.y
+
+        if show_stats and now >= overlay_due and stats.frame_times:
+            overlay_due = now + 0.5  # the percentiles only change slowly, no need to sort every frame
+            frame_p50, _, frame_p99, _ = stats.percentiles(stats.frame_times)
+            overlay = "{0:.0f} fps  frame p50 {1:.1f} p99 {2:.1f} ms".format(1000 / frame_p50, frame_p50, frame_p99)
+            if stats.latencies:
+                overlay += "  latency p50 {0:.0f} ms".format(stats.percentiles(stats.latencies)[0])
+
+        if run:
+            # only shift back what the last step moved, a still game is drawn where it is
+            draw_window(win, bird, pipes, base, score, accumulator / STEP if scrolled else 1.0, previous_y, overlay)
+            stats.flipped(time.perf_counter())
+
+    pygame.quit()
+    for line in stats.summary():
+        print(line)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play flappy bird")
+    parser.add_argument("--seed", type=int, help="seed of the course, the same seed always gives the same pipes")
+    parser.add_argument("--fps", type=float, default=0,
+                        help="frames drawn per second at most, 0 (the default) to sync to the display")
+    parser.add_argument("--show-stats", action="store_true", help="show frame times and input latency")
+    parser.add_argument("--seconds", type=float, help="quit after this many seconds")
+    args = parser.parse_args()
+    main(args.seed, args.fps, args.show_stats, args.seconds)
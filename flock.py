@@ -0,0 +1,209 @@
+"""
+Struct-of-arrays bird physics, so a whole population can be stepped at once.
+
+Every bird is a row in a handful of NumPy arrays instead of a Bird object.
+The rules are the same as Bird.move, Bird.jump and Bird.animate in
+game.py, only applied to all rows in one go.
+
+A bird keeps its row for its whole life, so row i always belongs to network i
+and genome i. Which birds are still alive is kept twice: as a boolean mask and
+as a list of the living rows, which is kept compact by swapping a bird that
+dies with the last living one. Looking up the living birds costs as much as
+there are living birds, not as much as the whole population.
+"""
+import numpy as np
+
+from game import Bird
+
+# Animation frame shown for each value of img_count (0 means it just wrapped), the same cycle as Bird.animate
+ANIMATION_FRAMES = np.array([0] * (Bird.ANIMATION_TIME + 1) + [1] * Bird.ANIMATION_TIME +
+                            [2] * Bird.ANIMATION_TIME + [1] * Bird.ANIMATION_TIME)
+
+
+class Flock:
+    # the same rules as a Bird, so taken from it
+    MAX_ROTATION = Bird.MAX_ROTATION
+    ROT_VEL = Bird.ROT_VEL
+    ANIMATION_TIME = Bird.ANIMATION_TIME
+    JUMP_VEL = Bird.JUMP_VEL
+
+    def __init__(self, size, x, y, img_heights):
+        """
+        :param size: number of birds
+        :param x: starting x position, shared by every bird
+        :param y: starting y position
+        :param img_heights: height of each animation frame, used for the floor check
+        """
+        self.x = x  # birds never move horizontally, so one x is enough
+        self.y = np.full(size, y, dtype=np.float64)
+        self.vel = np.zeros(size, dtype=np.float64)
+        self.tick_count = np.zeros(size, dtype=np.int64)  # ticks since last jump
+        self.height = self.y.copy()  # y at the last jump
+        self.tilt = np.zeros(size, dtype=np.int64)
+        self.img_count = np.zeros(size, dtype=np.int64)
+        self.frame = np.zeros(size, dtype=np.int64)  # which animation image each bird shows
+        self.alive = np.ones(size, dtype=bool)
+        self.living = np.arange(size)  # the living rows first, then the dead ones
+        self.slot = np.arange(size)  # where every row is in living
+        self.count = size  # number of living birds
+        self.fitness = np.zeros(size, dtype=np.float64)
+        self.img_heights = np.asarray(img_heights)
+
+    def __len__(self):
+        return len(self.y)
+
+    def alive_indices(self):
+        """
+        :return: array of the rows of the living birds, in no particular order
+        """
+        return self.living[:self.count].copy()
+
+    def any_alive(self):
+        return self.count > 0
+
+    def _rows(self, mask):
+        """
+        :param mask: boolean array or index array of birds
+        :return: sorted array of the rows it selects, without duplicates
+        """
+        mask = np.asarray(mask)
+        if mask.dtype == bool:
+            return np.flatnonzero(mask)
+        return np.unique(mask)
+
+    def _place(self, rows, start):
+        """
+        Swap rows into living[start:start + len(rows)], the rows that were there take their old places
+        """
+        stop = start + len(rows)
+        slots = self.slot[rows]
+        inside = (slots >= start) & (slots < stop)
+        vacated = slots[~inside]
+        displaced = np.ones(len(rows), dtype=bool)  # which of the rows in the block have to make room
+        displaced[slots[inside] - start] = False
+        displaced = self.living[start:stop][displaced]
+        self.living[vacated] = displaced
+        self.slot[displaced] = vacated
+        self.living[start:stop] = rows
+        self.slot[rows] = np.arange(start, stop)
+
+    def jump(self, mask):
+        """
+        Make the selected birds jump
+        :param mask: boolean array (or index array) of the birds that jump
+        :return: None
+        """
+        self.vel[mask] = self.JUMP_VEL
+        self.tick_count[mask] = 0
+        self.height[mask] = self.y[mask]
+
+    def move(self, rows=None):
+        """
+        Advance every bird by one frame, same as calling Bird.move on each of them
+        :param rows: index array of the birds to move, all of them if None
+        :return: None
+        """
+        if rows is not None:
+            self._move_rows(rows)
+            return
+
+        self.tick_count += 1
+        t = self.tick_count
+
+        # for downward acceleration
+        displacement = self.vel * t + 1.5 * t ** 2
+
+        # terminal velocity
+        displacement[displacement >= 16] = 16
+        displacement[displacement < 0] -= 2
+
+        self.y += displacement
+
+        tilt_up = (displacement < 0) | (self.y < self.height + 50)
+        np.maximum(self.tilt, self.MAX_ROTATION, out=self.tilt, where=tilt_up)
+        np.subtract(self.tilt, self.ROT_VEL, out=self.tilt, where=~tilt_up & (self.tilt > -90))
+
+    def _move_rows(self, rows):
+        """
+        move for only some of the birds, slower than moving all of them so move uses it only when asked
+        """
+        t = self.tick_count[rows] + 1
+        self.tick_count[rows] = t
+
+        displacement = self.vel[rows] * t + 1.5 * t ** 2
+        displacement[displacement >= 16] = 16
+        displacement[displacement < 0] -= 2
+
+        y = self.y[rows] + displacement
+        self.y[rows] = y
+
+        tilt = self.tilt[rows]
+        tilt_up = (displacement < 0) | (y < self.height[rows] + 50)
+        np.maximum(tilt, self.MAX_ROTATION, out=tilt, where=tilt_up)
+        np.subtract(tilt, self.ROT_VEL, out=tilt, where=~tilt_up & (tilt > -90))
+        self.tilt[rows] = tilt
+
+    def animate(self):
+        """
+        Advance the flapping animation of every bird by one frame
+        :return: None
+        """
+        self.img_count += 1
+        self.img_count[self.img_count == self.ANIMATION_TIME * 4 + 1] = 0
+        self.frame = ANIMATION_FRAMES[self.img_count]
+
+        # so when a bird is nose diving it isn't flapping
+        diving = self.tilt <= -80
+        self.frame[diving] = 1
+        self.img_count[diving] = self.ANIMATION_TIME * 2
+
+    def reward(self, amount):
+        """
+        Add to the fitness of every living bird
+        :param amount: fitness to add
+        :return: None
+        """
+        np.add(self.fitness, amount, out=self.fitness, where=self.alive)
+
+    def kill(self, mask):
+        """
+        :param mask: boolean array (or index array) of the birds that die, dead ones are ignored
+        :return: None
+        """
+        rows = self._rows(mask)
+        rows = rows[self.alive[rows]]
+        if len(rows):
+            self.count -= len(rows)
+            self._place(rows, self.count)  # just past the living ones
+            self.alive[rows] = False
+
+    def reset(self, mask, y):
+        """
+        Put the selected birds back at the start, alive and with no fitness
+        :param mask: boolean array (or index array) of the birds to reset
+        :param y: starting y position
+        :return: None
+        """
+        revived = self._rows(mask)
+        revived = revived[~self.alive[revived]]
+        if len(revived):
+            self._place(revived, self.count)  # right after the living ones
+            self.count += len(revived)
+        self.y[mask] = y
+        self.vel[mask] = 0
+        self.tick_count[mask] = 0
+        self.height[mask] = y
+        self.tilt[mask] = 0
+        self.img_count[mask] = 0
+        self.frame[mask] = 0
+        self.alive[mask] = True
+        self.fitness[mask] = 0
+
+    def out_of_bounds(self, floor):
+        """
+        :param floor: y position of the ground
+        :return: array of the rows of the living birds that hit the floor or the ceiling
+        """
+        alive = self.living[:self.count]
+        y = self.y[alive]
+        return alive[(y + self.img_heights[self.frame[alive]] >= floor) | (y < 0)]
@@ -0,0 +1,310 @@
+"""
+The game itself: the bird, the pipes and the ground, their physics and collisions.
+
+Importing this module needs no display and loads no images, the sprites and
+masks are loaded from the assets module the first time something uses them.
+"""
+import functools
+import importlib
+import random
+
+import numpy as np
+import pygame
+
+import assets
+from atlas import RotationAtlas, reachable_tilts
+
+MIN_WIDTH = 500
+MIN_HEIGHT = 800
+FLOOR = 730
+BIRD_X = 230  # where a game starts the birds
+BIRD_Y = 350
+FIRST_PIPE_X = 700  # x of the first pipe of a game
+PIPE_X = 600  # x of every pipe added after it
+
+
+
+def load_training():
+    """
+    :return: the training module, its file name has a space so it can't be imported with an import statement
+    """
+    return importlib.import_module("flappy_bird _neat")
+
+class Bird:
+    __slots__ = ("x", "y", "tilt", "tick_count", "vel", "height", "img_count", "frame")
+
+    MAX_ROTATION = 25  # How much the bird will tilt
+    ROT_VEL = 20  # How much we will rotate on each frame
+    ANIMATION_TIME = 5  # How long each bird animation will last
+    JUMP_VEL = -10.5  # Negative velocity means up
+
+    # This is the constructor, it is called when we create a new bird
+    def __init__(self, x, y):
+        self.x = x  # Starting x position
+        self.y = y  # Starting y position
+        self.tilt = 0  # Starting tilt
+        self.tick_count = 0  # How many ticks since last jump
+        self.vel = 0  # Starting velocity
+        self.height = self.y  # Starting height
+        self.img_count = (
+            0  # Which image we are currently showing, keeps track of the animation
+        )
+        self.frame = 0  # Starting image, an index into assets.bird_images()
+
+    @property
+    def img(self):
+        return assets.bird_images()[self.frame]  # loaded the first time a bird image is needed
+
+    def jump(self):
+        self.vel = self.JUMP_VEL  # Negative velocity means up
+        self.tick_count = 0  # Reset tick count
+        self.height = self.y  # Reset height
+
+    def move(self):
+        self.tick_count += 1
+
+        # for downward acceleration
+        displacement = self.vel * self.tick_count + 0.5 * (3) * self.tick_count ** 2  # calculate displacement
+
+        # terminal velocity
+        if displacement >= 16:
+            displacement = (displacement/abs(displacement)) * 16
+
+        if displacement < 0:
+            displacement -= 2
+
+        self.y = self.y + displacement
+
+        if displacement < 0 or self.y < self.height + 50:  # tilt up
+            if self.tilt < self.MAX_ROTATION:
+                self.tilt = self.MAX_ROTATION
+        else:  # tilt down
+            if self.tilt > -90:
+                self.tilt -= self.ROT_VEL
+
+    def animate(self):
+        """
+        Advance the flapping animation by one frame. This is kept apart from
+        draw so the bird looks (and collides) the same whether or not we render.
+        :return: None
+        """
+        self.img_count += 1  # Increment image count
+
+        # For animation of bird, loop through three images
+        if self.img_count <= self.ANIMATION_TIME:
+            self.frame = 0
+        elif self.img_count <= self.ANIMATION_TIME * 2:
+            self.frame = 1
+        elif self.img_count <= self.ANIMATION_TIME * 3:
+            self.frame = 2
+        elif self.img_count <= self.ANIMATION_TIME * 4:
+            self.frame = 1
+        elif self.img_count == self.ANIMATION_TIME * 4 + 1:
+            self.frame = 0
+            self.img_count = 0
+
+        # so when bird is nose diving it isn't flapping
+        if self.tilt <= -80:
+            self.frame = 1
+            self.img_count = self.ANIMATION_TIME * 2
+
+    def draw(self, win):
+        # tilt the bird
+        return bird_atlas().blit(win, self.frame, (self.x, self.y), self.tilt)
+
+    def get_mask(self):
+        return assets.bird_masks()[self.frame]  # This is for pixel perfect collision
+
+
+@functools.lru_cache(maxsize=None)
+def bird_atlas():
+    """
+    :return: RotationAtlas with every rotation the bird can be drawn at, rotated once up front
+    """
+    return RotationAtlas(assets.bird_images(), reachable_tilts(Bird.MAX_ROTATION, Bird.ROT_VEL))
+
+
+class Pipe:
+    __slots__ = ("x", "height", "top", "bottom", "passed")
+
+    GAP = 200
+    VEL = 5
+
+    def __init__(self, x, height=None):
+        self.reset(x, height)
+
+    def reset(self, x, height=None):
+        """
+        Put the pipe at x with a new height, so a pipe that left the screen can be used again
+        :param x: x position of the pipe
+        :param height: y position of the gap, random if None
+        :return: None
+        """
+        self.x = x  # x position of the pipe
+        self.passed = False
+        self.set_height(height)
+
+    @property
+    def PIPE_TOP(self):
+        return assets.pipe_top_image()  # the same flipped image for every pipe
+
+    @property
+    def PIPE_BOTTOM(self):
+        return assets.pipe_image()
+
+    def set_height(self, height=None):
+        if height is None:
+            height = random.randrange(
+                50, 450
+            )  # generates a random height for the pipe between 50 and 450
+        self.height = height
+        self.top = self.height - self.PIPE_TOP.get_height()
+        self.bottom = self.height + self.GAP
+
+    def move(self):
+        self.x -= self.VEL
+
+    def draw(self, win):
+        """
+        :return: list of the rects that were drawn on
+        """
+        return [win.blit(self.PIPE_TOP, (self.x, self.top)), win.blit(self.PIPE_BOTTOM, (self.x, self.bottom))]
+
+    def collide(self, bird):
+        """
+        returns if a point is colliding with the pipe
+        :param bird: Bird object
+        :return: Bool
+        """
+        bird_mask = bird.get_mask()
+        width, height = bird_mask.get_size()
+        y = round(bird.y)
+
+        # broad phase: the masks can only overlap if the rectangles do
+        if not self.overlaps_x(bird.x, width) or self.in_gap(y, height):
+            return False
+
+        top_offset = (self.x - bird.x, self.top - y)
+        bottom_offset = (self.x - bird.x, self.bottom - y)
+
+        top_mask, bottom_mask = assets.pipe_masks()
+        b_point = bird_mask.overlap(bottom_mask, bottom_offset)
+        t_point = bird_mask.overlap(top_mask, top_offset)
+
+        if b_point or t_point:
+            return True
+
+        return False
+
+    def collide_flock(self, flock):
+        """
+        returns which living birds of a flock collide with the pipe
+        :param flock: Flock object
+        :return: array of the rows of the birds that hit the pipe
+        """
+        bird_masks = assets.bird_masks()
+        width = max(mask.get_size()[0] for mask in bird_masks)
+        if not self.overlaps_x(flock.x, width):  # all birds share one x, so this culls the whole flock
+            return np.zeros(0, dtype=np.int64)
+
+        alive = flock.alive_indices()
+        y = np.round(flock.y[alive]).astype(np.int64)  # numpy rounds halves to even, same as round()
+        frame = flock.frame[alive]
+        outside = ~((y >= self.height) & (y + flock.img_heights[frame] <= self.bottom))
+
+        top_mask, bottom_mask = assets.pipe_masks()
+        hits = []
+        for i, f, bird_y in zip(alive[outside], frame[outside], y[outside]):
+            bird_mask = bird_masks[f]
+            top_offset = (self.x - flock.x, self.top - int(bird_y))
+            bottom_offset = (self.x - flock.x, self.bottom - int(bird_y))
+
+            if bird_mask.overlap(bottom_mask, bottom_offset) or bird_mask.overlap(top_mask, top_offset):
+                hits.append(i)
+
+        return np.array(hits, dtype=np.int64)
+
+    def overlaps_x(self, x, width):
+        """
+        returns if something at x that is width wide overlaps the pipe horizontally
+        """
+        return x < self.x + self.PIPE_BOTTOM.get_width() and self.x < x + width
+
+    def in_gap(self, y, height):
+        """
+        returns if something at y that is height tall is entirely inside the gap
+        """
+        return y >= self.height and y + height <= self.bottom
+
+
+class PipePool:
+    """
+    Pipes that went off the screen, handed out again instead of making new ones
+    """
+
+    def __init__(self):
+        self.free = []
+
+    def get(self, x, height=None):
+        """
+        :return: a Pipe at x with the given height
+        """
+        if self.free:
+            pipe = self.free.pop()
+            pipe.reset(x, height)
+            return pipe
+        return Pipe(x, height)
+
+    def release(self, pipe):
+        self.free.append(pipe)
+
+
+class Base:
+    __slots__ = ("y", "x1", "x2", "WIDTH")
+
+    VEL = 5
+
+    def __init__(self, y):
+        self.WIDTH = self.IMG.get_width()
+        self.y = y
+        self.x1 = 0
+        self.x2 = self.WIDTH
+
+    @property
+    def IMG(self):
+        return assets.base_image()
+
+    def move(self):
+        self.x1 -= self.VEL
+        self.x2 -= self.VEL
+
+        # This makes the base move infinitely
+        if self.x1 + self.WIDTH < 0:  # if the first base image is off the screen
+            self.x1 = (
+                    self.x2 + self.WIDTH
+            )  # move the first base image to the right of the second base image
+        if self.x2 + self.WIDTH < 0:  # if the second base image is off the screen
+            self.x2 = (
+                    self.x1 + self.WIDTH
+            )  # move the second base image to the right of the first base image
+
+    def draw(self, win):
+        """
+        :return: list of the rects that were drawn on
+        """
+        return [win.blit(self.IMG, (self.x1, self.y)), win.blit(self.IMG, (self.x2, self.y))]
+
+
+def blitRotateCenter(surf, image, topleft, angle):
+    """
+    Rotate a surface and blit it to the window
+    :param surf: the surface to blit to
+    :param image: the image surface to rotate
+    :param topLeft: the top left position of the image
+    :param angle: a float value for angle
+    :return: None
+    """
+    rotated_image = pygame.transform.rotate(image, angle)
+    new_rect = rotated_image.get_rect(center=image.get_rect(topleft=topleft).center)
+
+    surf.blit(rotated_image, new_rect.topleft)
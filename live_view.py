@@ -0,0 +1,236 @@
+"""
+Watching training from another process.
+
+The trainer publishes a small snapshot of every frame (the birds, the pipes,
+the ground, score, generation and alive count) into a ring buffer in shared
+memory. Writing one costs a few array copies and never waits for anything, so
+training runs the same with no viewer, one viewer or several of them. A viewer
+attaches to the ring, draws the newest snapshot at its own frame rate and skips
+whatever was written in between.
+
+Every slot of the ring carries the sequence number of the snapshot in it. The
+trainer zeroes it before writing a slot and sets it again after, so a viewer
+that copied a slot while it was being written notices and tries again.
+
+    python "flappy_bird _neat.py" --live flappy
+    python live_view.py flappy --fps 30
+"""
+import argparse
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pygame
+
+import assets
+from flock import Flock
+from game import FLOOR, Base, Pipe, load_training
+
+MAGIC = b"FBLIVE"
+VERSION = 1
+MAX_PIPES = 4  # pipes on the screen at once, there are never more than 3
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("slots", "<u4"), ("max_birds", "<u4"),
+                   ("closed", "<u4"), ("seq", "<u8")])
+
+
+def snapshot_dtype(max_birds):
+    """
+    :param max_birds: most birds a snapshot holds
+    :return: dtype of one slot of the ring
+    """
+    return np.dtype([("seq", "<u8"), ("frame", "<u4"), ("generation", "<u4"), ("score", "<u4"),
+                     ("alive", "<u4"), ("birds", "<u4"), ("pipes", "<u4"), ("pipe_ind", "<u4"),
+                     ("bird_x", "<i4"), ("base_x", "<i4", (2,)),
+                     ("pipe_x", "<i4", (MAX_PIPES,)), ("pipe_height", "<i4", (MAX_PIPES,)),
+                     ("bird_y", "<f4", (max_birds,)), ("bird_tilt", "<i2", (max_birds,)),
+                     ("bird_frame", "<u1", (max_birds,))])
+
+
+class SnapshotRing:
+    """
+    Ring buffer of frame snapshots in a named block of shared memory. The
+    trainer creates it with create and writes with publish, viewers attach to
+    it by name and read with latest.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner  # the process that created it also removes it
+        self.header = np.ndarray(1, dtype=HEADER, buffer=shm.buf)
+        if self.header["magic"][0] != MAGIC or self.header["version"][0] != VERSION:
+            raise ValueError("{0} is not a version {1} snapshot ring".format(shm.name, VERSION))
+        self.slots = int(self.header["slots"][0])
+        self.max_birds = int(self.header["max_birds"][0])
+        self.snapshots = np.ndarray(self.slots, dtype=snapshot_dtype(self.max_birds), buffer=shm.buf,
+                                    offset=HEADER.itemsize)
+        # views of every field, looked up once instead of on every publish
+        self.fields = {name: self.snapshots[name] for name in self.snapshots.dtype.names}
+        self.seq = int(self.header["seq"][0])
+
+    @classmethod
+    def create(cls, name, max_birds, slots=64):
+        """
+        :param name: name of the shared memory, viewers attach with the same name
+        :param max_birds: most birds a snapshot holds, the fittest ones are kept when more are alive
+        :param slots: snapshots kept in the ring
+        :return: SnapshotRing to publish to
+        """
+        size = HEADER.itemsize + slots * snapshot_dtype(max_birds).itemsize
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            try:
+                other = cls.attach(name)
+            except (FileNotFoundError, ValueError):
+                raise FileExistsError("shared memory {0} exists and is not a finished snapshot ring".format(name))
+            running = not other.closed
+            other.close()
+            if running:
+                raise FileExistsError("a trainer is still publishing as {0}, use another name".format(name))
+            # left behind by a trainer that finished, nobody writes to it anymore
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        header = np.ndarray(1, dtype=HEADER, buffer=shm.buf)
+        header[0] = (MAGIC, VERSION, slots, max_birds, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        :param name: name the trainer created the ring with
+        :return: SnapshotRing to read from
+        """
+        shm = shared_memory.SharedMemory(name)
+        # the resource tracker would remove the block when this process exits, it belongs to the trainer
+        resource_tracker.unregister(shm._name, "shared_memory")
+        if bytes(shm.buf[:len(MAGIC)]) == bytes(len(MAGIC)):
+            shm.close()
+            raise FileNotFoundError("{0} is still being set up".format(name))  # created, no header yet
+        return cls(shm, owner=False)
+
+    def publish(self, flock, pipes, base, score, generation, pipe_ind, frame):
+        """
+        Write the snapshot of a frame into the next slot, without waiting for any reader
+        :return: None
+        """
+        self.seq += 1
+        i = self.seq % self.slots
+        snapshots = self.fields
+        snapshots["seq"][i] = 0  # readers skip the slot until it is complete
+
+        alive = flock.alive_indices()
+        birds = alive
+        if len(birds) > self.max_birds:
+            birds = birds[np.argpartition(-flock.fitness[birds], self.max_birds - 1)[:self.max_birds]]
+        n = len(birds)
+        snapshots["bird_y"][i, :n] = flock.y[birds]
+        snapshots["bird_tilt"][i, :n] = flock.tilt[birds]
+        snapshots["bird_frame"][i, :n] = flock.frame[birds]
+
+        pipes = pipes[:MAX_PIPES]
+        snapshots["pipe_x"][i, :len(pipes)] = [pipe.x for pipe in pipes]
+        snapshots["pipe_height"][i, :len(pipes)] = [pipe.height for pipe in pipes]
+        snapshots["base_x"][i] = (base.x1, base.x2)
+        snapshots["bird_x"][i] = flock.x
+        snapshots["frame"][i] = frame
+        snapshots["generation"][i] = generation
+        snapshots["score"][i] = score
+        snapshots["alive"][i] = len(alive)
+        snapshots["birds"][i] = n
+        snapshots["pipes"][i] = len(pipes)
+        snapshots["pipe_ind"][i] = pipe_ind
+
+        snapshots["seq"][i] = self.seq
+        self.header["seq"][0] = self.seq
+
+    def latest(self):
+        """
+        :return: copy of the newest complete snapshot, or None if nothing was published yet
+        """
+        for attempt in range(3):
+            seq = int(self.header["seq"][0])
+            if seq == 0:
+                return None
+            i = seq % self.slots
+            snapshot = self.snapshots[i:i + 1].copy()[0]
+            if snapshot["seq"] == seq and self.snapshots["seq"][i] == seq:
+                return snapshot
+            # overwritten while it was copied, the trainer is a lap ahead, so look again
+        return None
+
+    @property
+    def closed(self):
+        """
+        :return: if the trainer is done publishing
+        """
+        return bool(self.header["closed"][0])
+
+    def close(self):
+        """
+        Detach, the trainer also marks the ring closed for its viewers and removes it
+        :return: None
+        """
+        if self.owner:
+            self.header["closed"][0] = 1
+        del self.header, self.snapshots, self.fields  # the memory can't be unmapped while arrays point into it
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def view(name, fps=30):
+    """
+    Show the newest snapshot of a trainer's ring until training ends or the window is closed
+    :param name: name the trainer publishes under
+    :param fps: frames drawn per second at most, snapshots in between are skipped
+    :return: None
+    """
+    train = load_training()
+
+    ring = None
+    while ring is None:
+        try:
+            ring = SnapshotRing.attach(name)
+        except FileNotFoundError:
+            print("Waiting for a trainer publishing as {0}".format(name))
+            time.sleep(1)
+
+    win = pygame.display.set_mode((train.MIN_WIDTH, train.MIN_HEIGHT))
+    renderer = train.Renderer(win)
+    clock = pygame.time.Clock()
+    base = Base(FLOOR)
+    shown = 0
+    while not ring.closed:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                ring.close()
+                return
+
+        snapshot = ring.latest()
+        if snapshot is not None and snapshot["seq"] != shown:
+            shown = snapshot["seq"]
+            birds = int(snapshot["birds"])
+            flock = Flock(birds, int(snapshot["bird_x"]), 0, [img.get_height() for img in assets.bird_images()])
+            flock.y[:] = snapshot["bird_y"][:birds]
+            flock.tilt[:] = snapshot["bird_tilt"][:birds]
+            flock.frame[:] = snapshot["bird_frame"][:birds]
+            count = int(snapshot["pipes"])
+            pipes = [Pipe(int(x), int(height))
+                     for x, height in zip(snapshot["pipe_x"][:count], snapshot["pipe_height"][:count])]
+            base.x1, base.x2 = (int(x) for x in snapshot["base_x"])
+            renderer.draw(flock, pipes, base, int(snapshot["score"]), int(snapshot["generation"]),
+                          min(int(snapshot["pipe_ind"]), max(len(pipes) - 1, 0)))
+        clock.tick(fps)
+
+    print("Training finished")
+    ring.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a flappy bird training run from another process")
+    parser.add_argument("name", help="name given to the trainer with --live")
+    parser.add_argument("--fps", type=float, default=30, help="frames drawn per second at most")
+    args = parser.parse_args()
+    view(args.name, args.fps)
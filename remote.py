@@ -0,0 +1,325 @@
+"""
+Evaluation on other machines: a coordinator hands out batches of genomes over
+TCP and worker processes play them and send the fitness back.
+
+The coordinator listens on an address, any number of workers connect to it
+and each of them is served by a thread of its own that sends it one batch at a
+time. A batch whose worker disconnects, crashes or takes longer than the job
+timeout goes back to the front of the queue for another worker, a batch that
+failed on max_attempts workers is given up on. Workers can come and go while
+training runs.
+
+Messages are pickles, and connections are authenticated with a shared key
+(multiprocessing.connection): anyone who has the key can run code on the
+coordinator and the workers, so only give it to machines you trust. There is
+no default key, without --authkey or FLAPPY_AUTHKEY the coordinator makes a
+random one and prints it.
+
+    python "flappy_bird _neat.py" --headless --remote 0.0.0.0:5000 --authkey secret
+    python remote.py coordinator-host:5000 --authkey secret   # on every worker machine
+"""
+import argparse
+import collections
+import os
+import pickle
+import secrets
+import socket
+import threading
+import time
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from game import load_training
+
+DEFAULT_AUTHKEY = os.environ.get("FLAPPY_AUTHKEY") or None  # None makes the coordinator pick a random key
+
+
+def parse_address(text):
+    """
+    :param text: HOST:PORT
+    :return: (host, port)
+    """
+    host, port = text.rsplit(":", 1)
+    return host, int(port)
+
+
+class RemoteJob:
+    """
+    One batch handed to the coordinator, get waits for its result like the
+    AsyncResult of a multiprocessing pool
+    """
+
+    def __init__(self, args, genomes):
+        self.args = args
+        self.genomes = genomes
+        self.data = None  # the pickled args, made by the first worker thread that sends it
+        self.attempts = 0
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def get(self, timeout=None):
+        if not self.done.wait(timeout):
+            raise TimeoutError("no result after {0} sec".format(timeout))
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.result
+
+
+class WorkerStats:
+    """
+    What a worker did since the stats were last reset, times in seconds
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.jobs = 0
+        self.genomes = 0
+        self.busy = 0.0  # from sending a batch until its result was unpickled
+        self.compute = 0.0  # playing the batch on the worker
+        self.serialize = 0.0  # pickling, on both ends
+        self.deserialize = 0.0  # unpickling, on both ends
+        self.sent = 0  # bytes
+        self.received = 0
+        self.failures = 0
+
+
+class Coordinator:
+    """
+    Queue of batches served to the workers connected over TCP
+    """
+
+    def __init__(self, address, authkey=DEFAULT_AUTHKEY, job_timeout=None, max_attempts=3):
+        """
+        :param address: (host, port) to listen on, port 0 picks a free one
+        :param authkey: key the workers have to know to connect, None for a random one that is printed
+        :param job_timeout: seconds a worker may take for a batch before it counts as failed, None to wait
+        :param max_attempts: number of workers a batch may fail on before it is given up
+        """
+        if authkey is None:
+            authkey = secrets.token_urlsafe(16)
+            print("Workers connect with --authkey {0}".format(authkey))
+        self.authkey = authkey
+        self.listener = Listener(address, authkey=authkey.encode())
+        self.address = self.listener.address  # with the port that was picked
+        self.job_timeout = job_timeout
+        self.max_attempts = max_attempts
+        self.queue = collections.deque()
+        self.condition = threading.Condition()
+        self.connected = set()  # names of the workers connected right now
+        self.stats = {}  # name -> WorkerStats of every worker that connected
+        self.closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    @property
+    def num_workers(self):
+        return len(self.connected)
+
+    def submit(self, args, genomes):
+        """
+        Queue a batch
+        :param args: arguments of eval_genome_chunk
+        :param genomes: number of genomes in the batch, for the stats
+        :return: RemoteJob
+        """
+        job = RemoteJob(args, genomes)
+        with self.condition:
+            self.queue.append(job)
+            self.condition.notify()
+        return job
+
+    def wait_for_workers(self, count=1):
+        """
+        Block until at least count workers are connected
+        :return: None
+        """
+        with self.condition:
+            if len(self.connected) < count:
+                print("Waiting for workers to connect to {0}:{1}".format(*self.address))
+            self.condition.wait_for(lambda: len(self.connected) >= count)
+
+    def reset_stats(self):
+        with self.condition:
+            for stats in self.stats.values():
+                stats.reset()
+
+    def report(self):
+        """
+        Print what every worker did since the stats were reset
+        :return: None
+        """
+        print("worker                          jobs  genomes  genomes/sec  compute  pickling  network  "
+              "sent KB  recv KB  failed")
+        total_busy = total_pickling = 0.0
+        for name, s in sorted(self.stats.items()):
+            if not s.jobs and not s.failures:
+                continue
+            pickling = s.serialize + s.deserialize
+            network = max(0.0, s.busy - s.compute - pickling)  # transfer and waiting
+            total_busy += s.busy
+            total_pickling += pickling
+            print("{0:30s} {1:5d} {2:8d} {3:12.1f} {4:7.3f}s {5:8.3f}s {6:7.3f}s {7:8.1f} {8:8.1f} {9:7d}".format(
+                name[:30], s.jobs, s.genomes, s.genomes / s.busy if s.busy > 0 else 0.0, s.compute, pickling,
+                network, s.sent / 1024, s.received / 1024, s.failures))
+        if total_busy > 0:
+            print("Serialization overhead: {0:.1%} of the time batches were out".format(
+                total_pickling / total_busy))
+
+    def close(self):
+        """
+        Stop handing out batches, the connected workers are told to exit
+        :return: None
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.listener.close()
+
+    def _accept(self):
+        while not self.closed:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                if self.closed:
+                    return
+                continue  # a client with the wrong key or that hung up right away
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _next_job(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.queue or self.closed)
+            return None if self.closed else self.queue.popleft()
+
+    def _serve(self, conn):
+        """
+        Feed one worker until it or the coordinator goes away
+        """
+        try:
+            name = conn.recv()  # the worker's host and pid
+        except (EOFError, OSError):
+            conn.close()
+            return
+        with self.condition:
+            self.connected.add(name)
+            stats = self.stats.setdefault(name, WorkerStats(name))
+            self.condition.notify_all()
+
+        job = None
+        try:
+            while True:
+                job = self._next_job()
+                if job is None:
+                    conn.send_bytes(pickle.dumps(("stop", None)))
+                    break
+
+                start = time.perf_counter()
+                if job.data is None:
+                    job.data = pickle.dumps(("job", job.args), protocol=pickle.HIGHEST_PROTOCOL)
+                    stats.serialize += time.perf_counter() - start
+                conn.send_bytes(job.data)
+                if self.job_timeout is not None and not conn.poll(self.job_timeout):
+                    raise TimeoutError("{0} took longer than {1} sec".format(name, self.job_timeout))
+                data = conn.recv_bytes()
+                received = time.perf_counter()
+                status, payload, timings = pickle.loads(data)
+                value = pickle.loads(payload)
+                finished = time.perf_counter()
+
+                stats.deserialize += finished - received + timings["deserialize"]
+                stats.serialize += timings["serialize"]
+                stats.compute += timings["compute"]
+                stats.busy += finished - start
+                stats.sent += len(job.data)
+                stats.received += len(data)
+                if status == "ok":
+                    stats.jobs += 1
+                    stats.genomes += job.genomes
+                    job.result = value
+                else:
+                    job.error = "batch failed on {0}:\n{1}".format(name, value)  # same on any worker
+                job.done.set()
+                job = None
+        except (EOFError, OSError, TimeoutError) as e:
+            stats.failures += 1
+            print("Lost worker {0}: {1!r}".format(name, e))
+            if job is not None:
+                self._requeue(job, name)
+        finally:
+            conn.close()
+            with self.condition:
+                self.connected.discard(name)
+
+    def _requeue(self, job, name):
+        job.attempts += 1
+        if job.attempts >= self.max_attempts:
+            job.error = "batch failed on {0} workers, the last one was {1}".format(job.attempts, name)
+            job.done.set()
+            return
+        with self.condition:
+            self.queue.appendleft(job)  # it is the oldest, the generation waits for it
+            self.condition.notify()
+
+
+def serve(address, authkey, retry_seconds=30):
+    """
+    Worker loop: connect to a coordinator and play the batches it sends until it says stop
+    :param address: (host, port) of the coordinator
+    :param authkey: key of the coordinator
+    :param retry_seconds: keep trying to (re)connect for this long before giving up
+    :return: None
+    """
+    train = load_training()
+    name = "{0}:{1}".format(socket.gethostname(), os.getpid())
+    deadline = time.monotonic() + retry_seconds
+    while True:
+        try:
+            conn = Client(address, authkey=authkey.encode())
+        except AuthenticationError:
+            print("The coordinator at {0}:{1} has a different key".format(*address))
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                print("No coordinator at {0}:{1}".format(*address))
+                return
+            time.sleep(0.5)
+            continue
+
+        try:
+            conn.send(name)
+            while True:
+                data = conn.recv_bytes()
+                start = time.perf_counter()
+                kind, args = pickle.loads(data)
+                if kind == "stop":
+                    return
+                loaded = time.perf_counter()
+                try:
+                    status, value = "ok", train.eval_genome_chunk(*args)
+                except Exception:
+                    status, value = "error", traceback.format_exc()
+                computed = time.perf_counter()
+                payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                timings = {"deserialize": loaded - start, "compute": computed - loaded,
+                           "serialize": time.perf_counter() - computed}
+                conn.send_bytes(pickle.dumps((status, payload, timings), protocol=pickle.HIGHEST_PROTOCOL))
+        except (EOFError, OSError):
+            deadline = time.monotonic() + retry_seconds  # the coordinator went away, it may come back
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate genomes for a flappy bird coordinator")
+    parser.add_argument("address", help="HOST:PORT the coordinator listens on")
+    parser.add_argument("--authkey", default=DEFAULT_AUTHKEY,
+                        help="key of the coordinator, FLAPPY_AUTHKEY by default")
+    parser.add_argument("--retry", type=float, default=30, metavar="SECONDS",
+                        help="how long to keep trying to reach the coordinator")
+    args = parser.parse_args()
+    if args.authkey is None:
+        parser.error("the key of the coordinator is needed, give --authkey or set FLAPPY_AUTHKEY")
+    serve(parse_address(args.address), args.authkey, args.retry)
@@ -0,0 +1,259 @@
+"""
+Recording of training episodes and replaying them.
+
+The game is deterministic, so an episode is fully described by the seed of
+its course and the frames at which every bird jumped. A log file is a short
+header followed by one record per episode:
+
+    episode header   generation, seed, decide_every, birds, frames, number of jumps
+    keys             int64 genome key of every bird
+    fitness          float64 fitness of every bird
+    jumps            (frame, bird) uint32 pairs in frame order
+
+ReplayLog maps the file into memory instead of reading it, so a log of a long
+run with a large population costs no more RAM than the parts that are used.
+
+    python replay.py run.replay --generation 12 --bird best --speed 2 --seek 500
+"""
+import argparse
+import os
+
+import numpy as np
+import pygame
+
+from game import load_training
+
+MAGIC = b"FBREPLAY"
+VERSION = 1
+FILE_HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("pad", "<u4")])
+EPISODE = np.dtype([("generation", "<i8"), ("seed", "<i8"), ("decide_every", "<u4"), ("birds", "<u4"),
+                    ("frames", "<u4"), ("pad", "<u4"), ("jumps", "<u8")])
+JUMP = np.dtype([("frame", "<u4"), ("bird", "<u4")])
+
+
+def pack_jumps(jumps):
+    """
+    :param jumps: list of (frame, array of the birds that jumped) like play() fills in
+    :return: array of JUMP records
+    """
+    packed = np.zeros(sum(len(birds) for frame, birds in jumps), dtype=JUMP)
+    i = 0
+    for frame, birds in jumps:
+        packed["frame"][i:i + len(birds)] = frame
+        packed["bird"][i:i + len(birds)] = birds
+        i += len(birds)
+    return packed
+
+
+def merge_jumps(parts):
+    """
+    Combine the jumps of birds that were played in separate chunks or courses
+    :param parts: list of (array of JUMP records, number to add to their birds)
+    :return: array of JUMP records sorted by frame
+    """
+    merged = np.concatenate([np.zeros(0, dtype=JUMP)] + [jumps for jumps, offset in parts])
+    merged["bird"] += np.repeat([offset for jumps, offset in parts],
+                                [len(jumps) for jumps, offset in parts]).astype(np.uint32)
+    return merged[np.argsort(merged["frame"], kind="stable")]
+
+
+def split_courses(jumps, count, courses):
+    """
+    Split the jumps of games that were played on several courses at once
+    :param jumps: array of JUMP records, the bird is the game: course * count + bird
+    :param count: birds per course
+    :param courses: number of courses
+    :return: list with an array of JUMP records for every course
+    """
+    split = []
+    for course in range(courses):
+        own = jumps[jumps["bird"] // count == course]  # a copy, so the birds can be renumbered
+        own["bird"] -= course * count
+        split.append(own)
+    return split
+
+
+class ReplayWriter:
+    """
+    Appends episodes to a log file
+    """
+
+    def __init__(self, path):
+        """
+        :param path: log file, a new one is started if it doesn't exist yet
+        """
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        if new:
+            self.file.write(np.array([(MAGIC, VERSION, 0)], dtype=FILE_HEADER).tobytes())
+
+    def write(self, generation, seed, keys, fitness, frames, jumps, decide_every=1):
+        """
+        Append one episode
+        :param generation: number of the generation
+        :param seed: seed of the course
+        :param keys: genome key of every bird
+        :param fitness: fitness of every bird
+        :param frames: number of frames the episode lasted
+        :param jumps: array of JUMP records, sorted by frame
+        :param decide_every: how often the networks were run, so a replay asks at the same frames
+        :return: None
+        """
+        header = np.array([(generation, seed, decide_every, len(keys), frames, 0, len(jumps))], dtype=EPISODE)
+        self.file.write(header.tobytes())
+        self.file.write(np.asarray(keys, dtype="<i8").tobytes())
+        self.file.write(np.asarray(fitness, dtype="<f8").tobytes())
+        self.file.write(np.asarray(jumps, dtype=JUMP).tobytes())
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Episode:
+    """
+    One recorded episode, its arrays are views into the memory mapped log
+    """
+
+    def __init__(self, header, keys, fitness, jumps):
+        self.generation = int(header["generation"])
+        self.seed = int(header["seed"])
+        self.decide_every = int(header["decide_every"])
+        self.frames = int(header["frames"])
+        self.keys = keys
+        self.fitness = fitness
+        self.jumps = jumps
+
+    def __len__(self):
+        return len(self.keys)
+
+    def best(self):
+        """
+        :return: index of the fittest bird
+        """
+        return int(np.argmax(self.fitness))
+
+    def jump_frames(self, bird):
+        """
+        :param bird: index of the bird
+        :return: array of the frames at which the bird jumped
+        """
+        return self.jumps["frame"][self.jumps["bird"] == bird]
+
+
+class ReplayLog:
+    """
+    A log file written by ReplayWriter, memory mapped
+    """
+
+    def __init__(self, path):
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        header = self.data[:FILE_HEADER.itemsize].view(FILE_HEADER)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError("{0} is not a version {1} replay log".format(path, VERSION))
+
+        self.offsets = []  # where every episode starts
+        offset = FILE_HEADER.itemsize
+        while offset + EPISODE.itemsize <= len(self.data):
+            episode = self.data[offset:offset + EPISODE.itemsize].view(EPISODE)[0]
+            size = EPISODE.itemsize + 16 * int(episode["birds"]) + JUMP.itemsize * int(episode["jumps"])
+            if offset + size > len(self.data):
+                break  # cut off while it was written
+            self.offsets.append(offset)
+            offset += size
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        offset = self.offsets[index]
+        header = self.data[offset:offset + EPISODE.itemsize].view(EPISODE)[0]
+        birds = int(header["birds"])
+        offset += EPISODE.itemsize
+        keys = self.data[offset:offset + 8 * birds].view("<i8")
+        offset += 8 * birds
+        fitness = self.data[offset:offset + 8 * birds].view("<f8")
+        offset += 8 * birds
+        jumps = self.data[offset:offset + JUMP.itemsize * int(header["jumps"])].view(JUMP)
+        return Episode(header, keys, fitness, jumps)
+
+    def generation(self, generation):
+        """
+        :return: the first episode of a generation
+        """
+        for i in range(len(self)):
+            episode = self[i]
+            if episode.generation == generation:
+                return episode
+        raise KeyError("no episode of generation {0}".format(generation))
+
+
+class ScriptedNetwork:
+    """
+    Stands in for the BatchNetwork in play() and jumps on the recorded frames
+    instead of running a network
+    """
+
+    def __init__(self, jump_frames, decide_every=1):
+        """
+        :param jump_frames: list with an array of the jump frames of every bird
+        :param decide_every: play() asks every this many frames, starting at frame 1
+        """
+        self.jump_frames = [set(frames.tolist()) for frames in jump_frames]
+        self.decide_every = decide_every
+        self.calls = 0
+
+    def __len__(self):
+        return len(self.jump_frames)
+
+    def activate(self, inputs, rows=None):
+        frame = 1 + self.calls * self.decide_every
+        self.calls += 1
+        if rows is None:
+            rows = range(len(self))
+        return np.array([[1.0 if frame in self.jump_frames[row] else 0.0] for row in rows]).reshape(-1, 1)
+
+
+def replay(episode, birds, speed=1.0, seek=1):
+    """
+    Watch birds of a recorded episode play it again
+    :param episode: Episode
+    :param birds: list of indices of the birds to show
+    :param speed: 1 is the speed of training, 2 twice as fast
+    :param seek: frame to start showing at, frames before it are simulated without drawing
+    :return: array with the fitness of the birds
+    """
+    train = load_training()
+    net = ScriptedNetwork([episode.jump_frames(bird) for bird in birds], episode.decide_every)
+    win = pygame.display.set_mode((train.MIN_WIDTH, train.MIN_HEIGHT))
+    renderer = train.Renderer(win, fps=30 * speed, start=seek)
+    train.gen = episode.generation + 1  # shown on screen, the same way as during training
+    fitness, frames, score, stopped = train.play(net, episode.seed, renderer, episode.frames,
+                                                 decide_every=episode.decide_every)
+    return fitness
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded flappy bird episode")
+    parser.add_argument("log", help="replay log written with --record")
+    parser.add_argument("--generation", type=int, help="generation to replay, the last one by default")
+    parser.add_argument("--bird", default="best",
+                        help="index of the bird to watch, best for the fittest one or all for every bird")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 is the speed of training")
+    parser.add_argument("--seek", type=int, default=1, metavar="FRAME", help="start watching at this frame")
+    args = parser.parse_args()
+
+    log = ReplayLog(args.log)
+    episode = log[len(log) - 1] if args.generation is None else log.generation(args.generation)
+    if args.bird == "all":
+        shown = list(range(len(episode)))
+    elif args.bird == "best":
+        shown = [episode.best()]
+    else:
+        shown = [int(args.bird)]
+
+    fitness = replay(episode, shown, args.speed, args.seek)
+    for bird, f in zip(shown, fitness):
+        print("bird {0} (genome {1}): fitness {2:.1f}, recorded {3:.1f}".format(
+            bird, episode.keys[bird], f, episode.fitness[bird]))
@@ -0,0 +1,103 @@
+"""
+Per-generation training metrics streamed to a file.
+
+neat.StatisticsReporter keeps the best genome and the fitness of every species
+of every generation in memory, which adds up over thousands of generations.
+StatsLog writes one line per generation instead and keeps nothing, so its
+memory stays the same however long the run is. Every line is flushed as soon
+as it is written, so the file can be read (or plotted, or tailed) while
+training is still running.
+
+A path ending in .csv gets a CSV file with a header, anything else gets one
+JSON object per line.
+"""
+import csv
+import json
+import os
+import time
+
+from neat.math_util import mean, stdev
+from neat.reporting import BaseReporter
+
+FIELDS = ("generation", "best_fitness", "mean_fitness", "stdev_fitness", "population", "species",
+          "frames", "score", "seconds", "elapsed")
+
+
+class StatsLog(BaseReporter):
+    """
+    Appends the metrics of every generation to a JSONL or CSV file
+    """
+
+    def __init__(self, path):
+        """
+        :param path: file to append to, it is created if it doesn't exist
+        """
+        self.path = path
+        self.csv = path.lower().endswith(".csv")
+        self.file = None  # opened on the first write
+        self.generation = None
+        self.start = None
+        self.frames = 0  # longest episode of this generation
+        self.score = 0  # most pipes passed in an episode of this generation
+        self.elapsed = 0.0  # seconds of all logged generations, kept across a resume
+
+    def __getstate__(self):
+        # saved in checkpoints, a resumed run opens the file again and appends to it
+        state = self.__dict__.copy()
+        state["file"] = None
+        return state
+
+    def record(self, frames, score):
+        """
+        Called after every episode of the generation
+        :param frames: number of frames that were played
+        :param score: pipes passed, by the bird that got furthest
+        :return: None
+        """
+        self.frames = max(self.frames, frames)
+        self.score = max(self.score, score)
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.start = time.perf_counter()
+        self.frames = 0
+        self.score = 0
+
+    def post_evaluate(self, config, population, species, best_genome):
+        seconds = time.perf_counter() - self.start
+        self.elapsed += seconds
+        fitness = [genome.fitness for genome in population.values()]
+        self.write({
+            "generation": self.generation,
+            "best_fitness": best_genome.fitness,
+            "mean_fitness": mean(fitness),
+            "stdev_fitness": stdev(fitness),
+            "population": len(population),
+            "species": len(species.species),
+            "frames": self.frames,
+            "score": self.score,
+            "seconds": round(seconds, 4),
+            "elapsed": round(self.elapsed, 4),
+        })
+
+    def write(self, row):
+        """
+        Append one line and flush it to the file
+        :param row: dict with a value for every name in FIELDS
+        :return: None
+        """
+        if self.file is None:
+            new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self.file = open(self.path, "a", newline="" if self.csv else None)
+            if self.csv and new:
+                csv.writer(self.file).writerow(FIELDS)
+        if self.csv:
+            csv.writer(self.file).writerow([row[name] for name in FIELDS])
+        else:
+            self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,288 @@
+"""
+Hyperparameter sweeps over config.txt.
+
+Every point of a sweep is a copy of config.txt with some keys changed. Each
+point is trained with run() from flappy_bird _neat.py, once per seed, in a
+pool of worker processes, so as many runs go at once as there are cores. The
+results of all runs end up in one table: after how many generations a bird
+reached the fitness threshold, the best fitness and the wall time.
+
+Finished runs are cached under .cache/sweep by a hash of their config, seed
+and options, so running a sweep again (or a bigger one) only trains the runs
+that are new.
+
+    python sweep.py --grid pop_size=20,50 --grid compatibility_threshold=2.5,3.0,3.5 --seeds 3
+    python sweep.py --random 12 --range node_add_prob=0.05:0.5 --range pop_size=20:100
+
+A spec file holds the same in JSON and can be combined with the flags:
+
+    {"grid": {"pop_size": [20, 50]}, "ranges": {"node_add_prob": [0.05, 0.5]}, "samples": 12}
+"""
+import argparse
+import configparser
+import contextlib
+import csv
+import hashlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from game import load_training
+
+LOCAL_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(LOCAL_DIR, ".cache", "sweep")
+
+
+def parse_value(text):
+    """
+    :return: text as an int or a float if it is one, else the text itself
+    """
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def find_section(parser, key):
+    """
+    :param parser: ConfigParser of a neat config
+    :param key: name of a config key, or section.key
+    :return: (section, key)
+    """
+    if "." in key:
+        section, key = key.split(".", 1)
+        if not parser.has_option(section, key):
+            raise KeyError("no {0} in [{1}] of the config".format(key, section))
+        return section, key
+    sections = [section for section in parser.sections() if parser.has_option(section, key)]
+    if not sections:
+        raise KeyError("no {0} in the config".format(key))
+    if len(sections) > 1:
+        raise KeyError("{0} is in several sections, use one of {1}".format(
+            key, ", ".join(section + "." + key for section in sections)))
+    return sections[0], key
+
+
+def sweep_points(grid, ranges, samples, rng):
+    """
+    :param grid: dict of key -> list of values, every combination is a point
+    :param ranges: dict of key -> (low, high) to draw values from, ints if both ends are ints
+    :param samples: number of random draws from the ranges, combined with every grid point
+    :param rng: random.Random the draws come from
+    :return: list of dicts of key -> value, one per point
+    """
+    keys = sorted(grid)
+    points = [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+    if not ranges:
+        return points
+
+    draws = []
+    for _ in range(samples):
+        draw = {}
+        for key, (low, high) in sorted(ranges.items()):
+            if isinstance(low, int) and isinstance(high, int):
+                draw[key] = rng.randint(low, high)
+            else:
+                draw[key] = round(rng.uniform(low, high), 6)
+        draws.append(draw)
+    return [dict(point, **draw) for point in points for draw in draws]
+
+
+def write_config(base_path, params):
+    """
+    :param base_path: config to start from
+    :param params: dict of key -> value to change in it
+    :return: text of the changed config
+    """
+    parser = configparser.ConfigParser()
+    parser.read(base_path)
+    for key, value in params.items():
+        section, option = find_section(parser, key)
+        parser.set(section, option, str(value))
+    out = io.StringIO()
+    parser.write(out)
+    return out.getvalue()
+
+
+def train_point(job):
+    """
+    Worker side of the sweep, trains one point with one seed
+    :param job: dict with the paths, params, seed and run() options of the run
+    :return: dict with the result, also saved in the cache
+    """
+    train = load_training()
+    random.seed(job["seed"])  # neat and the pipe courses both draw from random
+
+    if os.path.exists(job["stats"]):
+        os.remove(job["stats"])  # left over from a run that didn't finish, StatsLog would append to it
+    start = time.perf_counter()
+    with open(job["log"], "w") as log, contextlib.redirect_stdout(log):
+        train.run(job["config"], headless=True, stats=job["stats"], **job["options"])
+    seconds = time.perf_counter() - start
+
+    with open(job["stats"]) as f:
+        rows = [json.loads(line) for line in f]
+    parser = configparser.ConfigParser()
+    parser.read(job["config"])
+    threshold = parser.getfloat("NEAT", "fitness_threshold")
+    solved = [row["generation"] + 1 for row in rows if row["best_fitness"] >= threshold]
+
+    result = {
+        "params": job["params"],
+        "seed": job["seed"],
+        "generations": len(rows),
+        "generations_to_threshold": solved[0] if solved else None,
+        "best_fitness": max(row["best_fitness"] for row in rows),
+        "seconds": round(seconds, 3),
+    }
+    tmp_path = job["result"] + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, job["result"])  # a run only counts as done once its whole result is written
+    return result
+
+
+def make_jobs(base_path, points, seeds, options, cache_dir):
+    """
+    :return: list of the job of every point and seed, see train_point
+    """
+    jobs = []
+    for params in points:
+        text = write_config(base_path, params)
+        for seed in seeds:
+            key = hashlib.sha1(json.dumps([text, seed, options], sort_keys=True).encode()).hexdigest()[:16]
+            path = os.path.join(cache_dir, key)
+            jobs.append({"params": params, "seed": seed, "options": options, "text": text,
+                         "config": path + ".cfg", "stats": path + ".jsonl", "log": path + ".log",
+                         "result": path + ".json"})
+    return jobs
+
+
+def sweep(base_path, points, seeds, options, workers=None, cache_dir=CACHE_DIR):
+    """
+    Train every point with every seed, the runs that are in the cache are not trained again
+    :param base_path: config the points change
+    :param points: list of dicts of key -> value
+    :param seeds: list of seeds every point is trained with
+    :param options: dict of keyword arguments for run()
+    :param workers: number of processes, one per core by default
+    :param cache_dir: where finished runs are kept
+    :return: list of the result of every run, see train_point
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    jobs = make_jobs(base_path, points, seeds, options, cache_dir)
+
+    results = {}
+    pending = []
+    for job in jobs:
+        if os.path.exists(job["result"]):
+            with open(job["result"]) as f:
+                results[job["result"]] = json.load(f)
+        elif job["config"] not in (other["config"] for other in pending):  # random draws can repeat a point
+            with open(job["config"], "w") as f:
+                f.write(job.pop("text"))
+            pending.append(job)
+    print("{0} runs, {1} cached, {2} to train".format(len(jobs), len(results), len(pending)))
+
+    if pending:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        # one thread per process, the processes already fill the cores
+        for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(name, "1")
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+        start = time.perf_counter()
+        # a fresh process for every run, the training module keeps its settings in globals
+        with multiprocessing.Pool(workers, maxtasksperchild=1) as pool:
+            for done, (job, result) in enumerate(zip(pending, pool.imap(train_point, pending)), 1):
+                results[job["result"]] = result
+                print("[{0}/{1}] {2} seed {3}: best fitness {4:.1f} in {5:.1f} sec".format(
+                    done, len(pending), format_params(result["params"]), result["seed"],
+                    result["best_fitness"], result["seconds"]))
+        elapsed = time.perf_counter() - start
+        print("Trained {0} runs on {1} workers in {2:.1f} sec".format(len(pending), workers, elapsed))
+
+    return [results[job["result"]] for job in jobs]
+
+
+def format_params(params):
+    return " ".join("{0}={1}".format(key, value) for key, value in sorted(params.items())) or "(config.txt)"
+
+
+def print_table(results):
+    keys = sorted(set(key for result in results for key in result["params"]))
+    header = keys + ["seed", "to threshold", "best fitness", "seconds"]
+    rows = []
+    for result in results:
+        reached = result["generations_to_threshold"]
+        rows.append([str(result["params"].get(key, "")) for key in keys] +
+                    [str(result["seed"]), "-" if reached is None else str(reached),
+                     "{0:.1f}".format(result["best_fitness"]), "{0:.1f}".format(result["seconds"])])
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def write_csv(path, results):
+    keys = sorted(set(key for result in results for key in result["params"]))
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(keys + ["seed", "generations", "generations_to_threshold", "best_fitness", "seconds"])
+        for result in results:
+            writer.writerow([result["params"].get(key, "") for key in keys] +
+                            [result["seed"], result["generations"], result["generations_to_threshold"],
+                             result["best_fitness"], result["seconds"]])
+
+
+def parse_assignment(text):
+    if "=" not in text:
+        raise argparse.ArgumentTypeError("expected KEY=VALUE, got {0!r}".format(text))
+    return text.split("=", 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep config.txt keys over many training runs")
+    parser.add_argument("--config", default=os.path.join(LOCAL_DIR, "config.txt"), help="config to change")
+    parser.add_argument("--spec", help="JSON file with grid, ranges and samples")
+    parser.add_argument("--grid", type=parse_assignment, action="append", default=[], metavar="KEY=V1,V2",
+                        help="values of a key to try, every combination of the grid keys is trained")
+    parser.add_argument("--range", type=parse_assignment, action="append", default=[], metavar="KEY=LOW:HIGH",
+                        help="range of a key to draw random values from")
+    parser.add_argument("--random", type=int, metavar="N", help="number of random draws from the ranges")
+    parser.add_argument("--seeds", type=int, default=1, help="train every point with this many seeds")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first run of every point")
+    parser.add_argument("--workers", type=int, help="processes to train in, one per core by default")
+    parser.add_argument("--max-frames", type=int, metavar="N", help="frame budget of a generation")
+    parser.add_argument("--decide-every", type=int, default=1, metavar="K", help="run the networks every K frames")
+    parser.add_argument("--courses", type=int, default=1, help="courses every genome plays per generation")
+    parser.add_argument("--cache", default=CACHE_DIR, help="directory finished runs are kept in")
+    parser.add_argument("--output", default="sweep_results.csv", help="CSV file to write the table to")
+    args = parser.parse_args()
+
+    spec = {"grid": {}, "ranges": {}, "samples": 0}
+    if args.spec:
+        with open(args.spec) as f:
+            spec.update(json.load(f))
+    for key, values in args.grid:
+        spec["grid"][key] = [parse_value(value) for value in values.split(",")]
+    for key, bounds in args.range:
+        spec["ranges"][key] = [parse_value(value) for value in bounds.split(":")]
+    if args.random is not None:
+        spec["samples"] = args.random
+    if spec["ranges"] and not spec["samples"]:
+        parser.error("--range needs --random N")
+
+    points = sweep_points(spec["grid"], spec["ranges"], spec["samples"], random.Random(args.first_seed))
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    options = {"max_frames": args.max_frames, "decide_every": args.decide_every, "courses": args.courses}
+    results = sweep(args.config, points, seeds, options, args.workers, args.cache)
+
+    print_table(results)
+    write_csv(args.output, results)
+    print("Results written to {0}".format(args.output))
@@ -0,0 +1,115 @@
+"""
+The vectorized code paths have to play exactly like the object ones they replace:
+Flock like Bird, BatchNetwork like neat's FeedForwardNetwork, collide_flock like
+Pipe.collide and play_courses (VecEnv) like play.
+"""
+import os
+import random
+
+import neat
+import numpy as np
+import pytest
+
+import assets
+from batch_net import BatchNetwork
+from flock import Flock
+from game import BIRD_X, BIRD_Y, Bird, Pipe, load_training
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.txt")
+
+
+@pytest.fixture(scope="module")
+def train():
+    return load_training()
+
+
+@pytest.fixture(scope="module")
+def config():
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                              neat.DefaultStagnation, CONFIG_PATH)
+
+
+def make_genomes(config, count, mutations=0, seed=0):
+    random.seed(seed)
+    genomes = []
+    for key in range(count):
+        genome = config.genome_type(key)
+        genome.configure_new(config.genome_config)
+        for _ in range(mutations):
+            genome.mutate(config.genome_config)  # adds hidden nodes and disables connections
+        for connection in genome.connections.values():
+            connection.weight *= 3  # strong enough that some birds get far
+        genomes.append(genome)
+    return genomes
+
+
+def img_heights():
+    return [img.get_height() for img in assets.bird_images()]
+
+
+def test_flock_moves_like_birds():
+    rng = np.random.default_rng(0)
+    size = 64
+    flock = Flock(size, BIRD_X, BIRD_Y, img_heights())
+    birds = [Bird(BIRD_X, BIRD_Y) for _ in range(size)]
+    for frame in range(300):
+        jumps = rng.random(size) < 0.08
+        flock.jump(jumps)
+        for bird, jumped in zip(birds, jumps):
+            if jumped:
+                bird.jump()
+        if frame % 2:
+            flock.move()
+        else:
+            flock.move(np.arange(size))  # the per-row path has to agree too
+        flock.animate()
+        for bird in birds:
+            bird.move()
+            bird.animate()
+
+        assert flock.y.tolist() == [bird.y for bird in birds]
+        assert flock.tilt.tolist() == [bird.tilt for bird in birds]
+        assert flock.frame.tolist() == [bird.frame for bird in birds]
+
+
+def test_batch_network_activates_like_feed_forward(config):
+    genomes = make_genomes(config, 40, mutations=8)
+    net = BatchNetwork.create(genomes, config)
+    inputs = np.random.default_rng(1).uniform(-50, 750, (len(genomes), 3))
+
+    output = net.activate(inputs)
+    expected = np.array([neat.nn.FeedForwardNetwork.create(genome, config).activate(list(row))
+                         for genome, row in zip(genomes, inputs)])
+    np.testing.assert_allclose(output, expected, rtol=1e-12, atol=1e-12)
+    assert ((output[:, 0] > 0.5) == (expected[:, 0] > 0.5)).all()
+
+
+def test_collide_flock_matches_collide():
+    rng = np.random.default_rng(2)
+    size = 200
+    for _ in range(50):
+        pipe = Pipe(int(rng.integers(150, 300)), int(rng.integers(50, 450)))
+        flock = Flock(size, BIRD_X, BIRD_Y, img_heights())
+        flock.y[:] = rng.uniform(-60, 760, size)
+        flock.y[::7] = np.round(flock.y[::7]) + 0.5  # halves round the same way
+        flock.frame[:] = rng.integers(0, 3, size)
+        flock.kill(np.arange(0, size, 11))  # dead birds never collide
+
+        hits = np.zeros(size, dtype=bool)
+        hits[pipe.collide_flock(flock)] = True
+        for i in range(size):
+            bird = Bird(BIRD_X, flock.y[i])
+            bird.frame = int(flock.frame[i])
+            assert hits[i] == (flock.alive[i] and pipe.collide(bird)), i
+
+
+@pytest.mark.parametrize("seed", [1, 3])
+@pytest.mark.parametrize("budget", [{"max_frames": 19}, {"max_frames": 211}, {"max_score": 2, "max_frames": 2000}])
+def test_play_courses_plays_like_play(train, config, seed, budget):
+    genomes = make_genomes(config, 60)
+    fitness, frames, score, stopped = train.play(BatchNetwork.create(genomes, config), seed, **budget)
+    course_fitness, course_frames, course_score, course_stopped = train.play_courses(
+        BatchNetwork.create(genomes, config), [seed], **budget)
+
+    assert course_fitness[0].tolist() == fitness.tolist()  # bit for bit, also for the games a budget cut
+    assert (course_frames, course_score, course_stopped) == (frames, score, stopped)
@@ -0,0 +1,110 @@
+"""
+Per-phase timing of the training loop, reported through neat's reporter hooks.
+"""
+import time
+
+from neat.reporting import BaseReporter
+
+
+class NullTimer:
+    """
+    Stand-in used when timing is off, every call does nothing
+    """
+
+    def start_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class PhaseTimer:
+    """
+    Adds up the time spent in each phase of the frame loop. Call start_frame at
+    the top of a frame and mark(phase) at the end of every phase; the time since
+    the previous call is added to that phase.
+    """
+
+    def __init__(self, histogram=False):
+        """
+        :param histogram: also keep the duration of every frame
+        """
+        self.histogram = histogram
+        self.reset()
+
+    def reset(self):
+        self.totals = {}
+        self.frames = 0
+        self.frame_times = []
+        self.last = self.frame_start = time.perf_counter()
+
+    def start_frame(self):
+        self.last = self.frame_start = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.totals[phase] = self.totals.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def end_frame(self):
+        self.frames += 1
+        if self.histogram:
+            self.frame_times.append(self.last - self.frame_start)
+
+
+class TimingReporter(BaseReporter):
+    """
+    Prints where the time of every generation went: physics, network activation,
+    collision, pipe bookkeeping and rendering.
+    """
+
+    def __init__(self, histogram=False):
+        """
+        :param histogram: also print a histogram of the frame times
+        """
+        self.timer = PhaseTimer(histogram)
+        self.generation = None
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.timer.reset()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        timer = self.timer
+        if not timer.frames:
+            return
+
+        total = sum(timer.totals.values())
+        print("Phase timing for generation {0}: {1} frames in {2:.3f} sec ({3:.1f} frames/sec)".format(
+            self.generation, timer.frames, total, timer.frames / total if total > 0 else float("inf")))
+        for phase, seconds in sorted(timer.totals.items(), key=lambda item: -item[1]):
+            print("  {0:10s} {1:9.3f} sec {2:6.1%} {3:9.1f} us/frame".format(
+                phase, seconds, seconds / total if total > 0 else 0.0, 1e6 * seconds / timer.frames))
+
+        if timer.histogram:
+            self.print_histogram(timer.frame_times)
+
+    @staticmethod
+    def print_histogram(frame_times):
+        """
+        Print how many frames took between 2**k and 2**(k+1) microseconds
+        :param frame_times: list of frame durations in seconds
+        :return: None
+        """
+        buckets = {}
+        for seconds in frame_times:
+            bucket = max(0, int(seconds * 1e6)).bit_length()
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+
+        most = max(buckets.values())
+        print("  frame time histogram:")
+        for bucket in range(min(buckets), max(buckets) + 1):
+            count = buckets.get(bucket, 0)
+            low = 0 if bucket == 0 else 2 ** (bucket - 1)
+            print("  {0:>8d}-{1:<8d}us {2:7d} {3}".format(low, 2 ** bucket, count, "#" * (40 * count // most)))
@@ -0,0 +1,258 @@
+"""
+Many independent games stepped at once, with a reset/step interface.
+
+Every game has one bird and its own pipe course. The birds are the rows of a
+Flock, and since the pipes of every game move the same way and only differ in
+their heights, the pipes are two x positions per game instead of Pipe objects.
+Collisions are looked up in tables built from the same masks Pipe.collide uses,
+so a game plays out exactly like play() in flappy_bird _neat.py. Needs no
+display, only the images to build the masks from.
+"""
+import functools
+
+import numpy as np
+import pygame
+
+import assets
+from course import get_course
+from flock import Flock
+from game import BIRD_X, BIRD_Y, FIRST_PIPE_X, FLOOR, PIPE_X, Pipe
+
+NO_PIPE = -10 ** 6  # x of a pipe that doesn't exist, far left of everything
+
+
+def mask_array(mask):
+    """
+    :param mask: pygame mask
+    :return: (height, width) boolean array, True where the mask is set
+    """
+    return pygame.surfarray.array_red(mask.to_surface()).T > 0
+
+
+class CollisionTable:
+    """
+    Whether a bird mask overlaps a pipe mask, for every animation frame and every
+    offset of the pipe from the bird, worked out once with NumPy.
+
+    table[frame, dx, dy] is True when the mask of a bird at (x, y) overlaps the
+    pipe mask at (x + dx, y + dy), same as bird_mask.overlap(pipe_mask, (dx, dy)).
+    """
+
+    def __init__(self, bird_masks, pipe_mask):
+        """
+        :param bird_masks: list of masks of the animation frames, all the same size
+        :param pipe_mask: mask of the pipe
+        """
+        birds = [mask_array(mask) for mask in bird_masks]
+        pipe = mask_array(pipe_mask).astype(np.float32)  # float so the products below go through BLAS
+        bird_height, bird_width = birds[0].shape
+        pipe_height, pipe_width = pipe.shape
+
+        # outside these ranges the masks don't even touch
+        self.min_dx, self.max_dx = 1 - pipe_width, bird_width - 1
+        self.min_dy, self.max_dy = 1 - pipe_height, bird_height - 1
+        self.table = np.zeros((len(birds), self.max_dx - self.min_dx + 1, self.max_dy - self.min_dy + 1), dtype=bool)
+
+        rows = np.arange(bird_height)[:, None] - np.arange(pipe_height)[None, :] - self.min_dy  # dy of each row pair
+        for frame, bird in enumerate(birds):
+            bird = bird.astype(np.float32)
+            for dx in range(self.min_dx, self.max_dx + 1):
+                columns = np.arange(max(0, dx), min(bird_width, pipe_width + dx))  # bird columns over the pipe
+                # which rows of the bird overlap which rows of the pipe when lined up like this
+                touching = bird[:, columns] @ pipe[:, columns - dx].T > 0
+                self.table[frame, dx - self.min_dx] = np.bincount(rows[touching], minlength=self.table.shape[2]) > 0
+
+    def collide(self, frame, dx, dy):
+        """
+        :param frame: array with the animation frame of every bird
+        :param dx: array with the x of the pipe minus the x of every bird
+        :param dy: array with the y of the pipe minus the y of every bird
+        :return: boolean array, True where the masks overlap
+        """
+        inside = (dx >= self.min_dx) & (dx <= self.max_dx) & (dy >= self.min_dy) & (dy <= self.max_dy)
+        hits = np.zeros(len(frame), dtype=bool)
+        hits[inside] = self.table[frame[inside], dx[inside] - self.min_dx, dy[inside] - self.min_dy]
+        return hits
+
+
+@functools.lru_cache(maxsize=None)
+def collision_tables():
+    """
+    :return: (CollisionTable of the top pipe, CollisionTable of the bottom pipe)
+    """
+    top_mask, bottom_mask = assets.pipe_masks()
+    return CollisionTable(assets.bird_masks(), top_mask), CollisionTable(assets.bird_masks(), bottom_mask)
+
+
+class VecEnv:
+    """
+    num_envs games of one bird each. reset starts games on the courses of the
+    given seeds, step makes the birds of every running game jump or not and plays
+    one frame. Both return the observation play() gives the networks: the y of
+    the bird and its distance to the top and the bottom of the next pipe.
+
+    The reward of a step is what it added to the fitness of the bird: 0.1 for the
+    frame, -1 for hitting a pipe and 5 for passing one, so the rewards of a game
+    add up to the fitness play() would give the same bird.
+    """
+
+    def __init__(self, num_envs):
+        """
+        :param num_envs: number of games
+        """
+        self.num_envs = num_envs
+        self.flock = Flock(num_envs, BIRD_X, BIRD_Y, [img.get_height() for img in assets.bird_images()])
+        self.flock.kill(np.arange(num_envs))  # nothing runs until it is reset
+        self.frames = np.zeros(num_envs, dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.pipe_x = np.zeros(num_envs, dtype=np.int64)  # x of the newest pipe, pipe number score
+        self.prev_x = np.full(num_envs, NO_PIPE, dtype=np.int64)  # x of the pipe before it
+        self.seeds = [None] * num_envs
+        self.heights = np.zeros((num_envs, 0), dtype=np.int64)  # pipe heights of the course of every game
+        self.obs = np.zeros((num_envs, 3))
+        # fitness of every game before the 0.1 of the frame it is in, what play() gives a bird
+        # whose game a budget stops before that frame is played
+        self.settled = np.zeros(num_envs)
+
+        pipe = assets.pipe_image()
+        self.pipe_width = pipe.get_width()
+        self.pipe_length = pipe.get_height()
+        self.bird_y = BIRD_Y
+
+    def __len__(self):
+        return self.num_envs
+
+    @property
+    def fitness(self):
+        """
+        :return: array with the fitness of every bird, added up in the same order as play() does.
+                 A game that is still running already has the 0.1 of the frame it is in
+        """
+        return self.flock.fitness
+
+    @property
+    def done(self):
+        return ~self.flock.alive
+
+    def reset(self, seeds, envs=None):
+        """
+        Start new games
+        :param seeds: course seed of every game, or one seed for all of them, not None
+        :param envs: indices of the games to start, all of them if None
+        :return: (num_envs, 3) array of observations
+        """
+        envs = np.arange(self.num_envs) if envs is None else np.asarray(envs)
+        seeds = np.broadcast_to(np.asarray(seeds, dtype=object), envs.shape)
+        if any(seed is None for seed in seeds):
+            # a game without a seed would have no course, its pipe heights would all be 0
+            raise ValueError("every game needs a course seed, got None")
+
+        for i, seed in zip(envs, seeds):
+            self.seeds[i] = seed
+        self._load_heights(envs, max(2, self.heights.shape[1]))
+
+        self.flock.reset(envs, self.bird_y)
+        self.frames[envs] = 0
+        self.score[envs] = 0
+        self.pipe_x[envs] = FIRST_PIPE_X
+        self.prev_x[envs] = NO_PIPE
+
+        self._start_frame(envs)
+        return self.obs
+
+    def step(self, actions):
+        """
+        Play one frame of every running game
+        :param actions: (num_envs,) boolean array, True for the birds that jump
+        :return: (observations, rewards, done), done is True for every game that has ended
+        """
+        flock = self.flock
+        running = flock.alive.copy()
+        rows = np.flatnonzero(running)
+        rewards = np.zeros(self.num_envs)
+        rewards[rows] = 0.1  # paid for this frame when it started
+
+        flock.jump(rows[np.asarray(actions)[rows]])
+
+        # move the pipes, only the newest two can be near the bird
+        self.pipe_x[rows] -= Pipe.VEL
+        self.prev_x[rows] -= Pipe.VEL
+
+        # collide with both of them
+        y = np.round(flock.y[rows]).astype(np.int64)  # numpy rounds halves to even, same as Pipe.collide_flock
+        frame = flock.frame[rows]
+        score = self.score[rows]
+        hits = self._collide(frame, self.pipe_x[rows] - BIRD_X, self.heights[rows, score], y)
+        has_prev = score > 0
+        hits[has_prev] |= self._collide(frame[has_prev], self.prev_x[rows[has_prev]] - BIRD_X,
+                                        self.heights[rows[has_prev], score[has_prev] - 1], y[has_prev])
+        crashed = rows[hits]
+        flock.fitness[crashed] -= 1
+        rewards[crashed] -= 1
+        flock.kill(crashed)
+
+        # pass the newest pipe, the next one is added at PIPE_X
+        passed = rows[self.pipe_x[rows] < BIRD_X]
+        self.score[passed] += 1
+        self.prev_x[passed] = self.pipe_x[passed]
+        self.pipe_x[passed] = PIPE_X
+        rewarded = passed[flock.alive[passed]]  # birds that crashed into the pipe they passed get nothing
+        flock.fitness[rewarded] += 5
+        rewards[rewarded] += 5
+        if len(passed) and self.score[passed].max() + 1 >= self.heights.shape[1]:
+            self._load_heights(np.arange(self.num_envs), 2 * self.heights.shape[1])
+
+        flock.kill(flock.out_of_bounds(FLOOR))
+        flock.animate()
+        self.frames[rows] += 1
+
+        self._start_frame(rows[flock.alive[rows]])
+        return self.obs, rewards, ~flock.alive
+
+    def _collide(self, frame, dx, height, y):
+        """
+        :return: boolean array, True for every bird that hits the top or the bottom of its pipe
+        """
+        top_table, bottom_table = collision_tables()
+        return (top_table.collide(frame, dx, height - self.pipe_length - y) |
+                bottom_table.collide(frame, dx, height + Pipe.GAP - y))
+
+    def _start_frame(self, rows):
+        """
+        The start of the next frame of the games in rows, up to where play() runs the networks:
+        pick the pipe to look at, pay 0.1 for the frame, move the birds and observe
+        """
+        flock = self.flock
+        # the pipe before the newest one is looked at until the bird is past its right edge
+        prev = (self.score[rows] > 0) & (BIRD_X <= self.prev_x[rows] + self.pipe_width)
+        height = self.heights[rows, self.score[rows] - prev]
+
+        fitness = flock.fitness[rows]
+        self.settled[rows] = fitness
+        flock.fitness[rows] = fitness + 0.1
+        flock.move(rows)
+
+        y = flock.y[rows]
+        self.obs[rows, 0] = y
+        self.obs[rows, 1] = np.abs(y - height)
+        self.obs[rows, 2] = np.abs(y - (height + Pipe.GAP))
+
+    def _load_heights(self, envs, length):
+        """
+        Make the heights array at least length pipes long and fill in the rows of envs
+        """
+        if length > self.heights.shape[1]:
+            grown = np.zeros((self.num_envs, length), dtype=np.int64)
+            grown[:, :self.heights.shape[1]] = self.heights
+            self.heights = grown
+            envs = np.arange(self.num_envs)  # every row needs its new columns
+        length = self.heights.shape[1]
+
+        by_seed = {}
+        for i in envs:
+            if self.seeds[i] is not None:
+                by_seed.setdefault(self.seeds[i], []).append(i)
+        for seed, rows in by_seed.items():
+            course = get_course(seed)
+            course[length - 1]  # draws the heights up to length
+            self.heights[rows] = course.heights[:length]